@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, users
+from app.api.endpoints import agenda, auth, checkin, stats, users
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
\ No newline at end of file
+api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(agenda.router, prefix="/sessions", tags=["agenda"])
+api_router.include_router(checkin.router, prefix="/checkin", tags=["checkin"])
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
@@ -0,0 +1,116 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db, get_async_read_db
+from app.core.security import get_current_organizer, get_current_user
+from app.crud.agenda import (
+    cancel_reservation, create_session, delete_session, get_reserved_session_ids,
+    get_session, get_sessions, reserve_seat, update_session,
+)
+from app.schemas.agenda import AgendaSessionCreate, AgendaSessionResponse, AgendaSessionUpdate, ReservationResponse
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[AgendaSessionResponse])
+async def read_sessions(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    sessions = await get_sessions(db)
+    reserved = await get_reserved_session_ids(db, current_user.id)
+    return [
+        AgendaSessionResponse.model_validate(session).model_copy(update={"reserved": session.id in reserved})
+        for session in sessions
+    ]
+
+
+@router.post("/", response_model=AgendaSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_agenda_session(
+    session_data: AgendaSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Any:
+    return await create_session(db, session_data)
+
+
+@router.get("/{session_id}", response_model=AgendaSessionResponse)
+async def read_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    session = await get_session(db, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
+    reserved = session_id in await get_reserved_session_ids(db, current_user.id)
+    return AgendaSessionResponse.model_validate(session).model_copy(update={"reserved": reserved})
+
+
+@router.put("/{session_id}", response_model=AgendaSessionResponse)
+async def update_agenda_session(
+    session_id: int,
+    session_data: AgendaSessionUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Any:
+    session = await update_session(db, session_id, session_data)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
+    return session
+
+
+@router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_agenda_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Response:
+    if not await delete_session(db, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/{session_id}/reservation", response_model=ReservationResponse, status_code=status.HTTP_201_CREATED)
+async def reserve_session_seat(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    reservation, seats_left = await reserve_seat(db, session_id, current_user.id)
+    return ReservationResponse(
+        session_id=reservation.session_id,
+        user_id=reservation.user_id,
+        created_at=reservation.created_at,
+        seats_left=seats_left,
+    )
+
+
+@router.delete("/{session_id}/reservation", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_session_reservation(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    if not await cancel_reservation(db, session_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="You have no seat in this session",
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
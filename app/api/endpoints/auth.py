@@ -1,12 +1,13 @@
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import create_access_token, get_current_user
+from app.core.rate_limit import check_login_rate_limit
 from app.crud.user import authenticate_user, create_user
 from app.schemas.token import Token
 from app.schemas.user import UserCreate, UserResponse
@@ -17,20 +18,23 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    user = create_user(db, user_data)
+    user = await create_user(db, user_data)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(get_db),
+async def login(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
-    user = authenticate_user(db, form_data.username, form_data.password)
+    check_login_rate_limit(request, form_data.username)
+    
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,7 +51,7 @@ def login(
 
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(
+async def read_users_me(
     current_user: User = Depends(get_current_user)
 ) -> Any:
     return current_user 
\ No newline at end of file
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.badges import badge_index, badge_token, check_in_badge, checkin_recorder
+from app.core.database import get_async_read_db
+from app.core.security import get_current_organizer, get_current_user
+from app.schemas.checkin import (
+    BadgeResponse, CheckInRequest, CheckInResponse, CheckInStats,
+    CheckInSyncRequest, CheckInSyncResponse, SyncResult,
+)
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/badge", response_model=BadgeResponse)
+async def read_badge(current_user: User = Depends(get_current_user)) -> Any:
+    """The signed token to print as the participant's badge QR code"""
+    return BadgeResponse(user_id=current_user.id, token=badge_token(current_user.id))
+
+
+@router.post("/", response_model=CheckInResponse)
+async def check_in(
+    scan: CheckInRequest,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Any:
+    user_id, entry, first = await check_in_badge(db, scan.token, datetime.utcnow(), scan.device)
+    return CheckInResponse(
+        status="checked_in" if first else "already_checked_in",
+        user_id=user_id,
+        name=entry.name,
+        organization=entry.organization,
+        checked_in_at=entry.checked_in_at,
+    )
+
+
+@router.post("/sync", response_model=CheckInSyncResponse)
+async def sync_check_ins(
+    batch: CheckInSyncRequest,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Any:
+    """Upload scans an offline scanner recorded; the earliest scan of a participant wins, even over one on record"""
+    results = []
+    counts = {"checked_in": 0, "already_checked_in": 0, "invalid": 0}
+    for scan in sorted(batch.scans, key=lambda scan: scan.scanned_at):
+        try:
+            user_id, _, first = await check_in_badge(db, scan.token, scan.scanned_at, batch.device)
+        except HTTPException:
+            counts["invalid"] += 1
+            results.append(SyncResult(token=scan.token, status="invalid"))
+            continue
+        result_status = "checked_in" if first else "already_checked_in"
+        counts[result_status] += 1
+        results.append(SyncResult(token=scan.token, status=result_status, user_id=user_id))
+
+    logger.info(f"Synced {len(batch.scans)} offline scans from {batch.device or 'unknown device'}: {counts}")
+    return CheckInSyncResponse(**counts, results=results)
+
+
+@router.get("/stats", response_model=CheckInStats)
+async def check_in_stats(current_user: User = Depends(get_current_organizer)) -> Any:
+    return CheckInStats(
+        participants=len(badge_index.entries),
+        checked_in=badge_index.checked_in,
+        pending_writes=len(checkin_recorder.pending),
+    )
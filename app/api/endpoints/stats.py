@@ -0,0 +1,31 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.conditional import make_etag, is_not_modified, not_modified, set_validators
+from app.core.database import get_async_read_db
+from app.core.security import get_current_organizer
+from app.core.stats import participant_stats
+from app.models.user import User
+from app.schemas.stats import ParticipantStats
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ParticipantStats)
+async def read_participant_stats(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_organizer),
+) -> Any:
+    """Participant counts by gender, age bracket, nationality and organization"""
+    stats, version = await participant_stats.get(db)
+    # Ages move on with the date as well as with the data
+    etag = make_etag("stats", version, participant_stats.key[1])
+    if is_not_modified(request, etag, stats.updated_at):
+        return not_modified(etag, stats.updated_at)
+
+    set_validators(response, etag, stats.updated_at)
+    return stats
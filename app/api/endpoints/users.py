@@ -1,48 +1,173 @@
-from typing import Any, List
+from datetime import date
+from enum import Enum
+from typing import Any, AsyncIterator, Optional
+import csv
+import io
+import json
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.crud.user import get_users, get_user, update_user
-from app.schemas.user import UserResponse, UserUpdate
+from app.core.database import get_async_db, get_async_read_db
+from app.core.security import get_current_organizer, get_current_user
+from app.crud.user import SORT_COLUMNS, EXPORT_COLUMNS, get_users, get_user, update_user, count_users, stream_users
+from app.crud.change_version import get_users_version
+from app.schemas.user import UserResponse, UserUpdate, UserPage, UserFilter, ImportReport
+from app.core.bulk_import import parse_import_file, import_users
+from app.core.conditional import make_etag, is_not_modified, not_modified, set_validators
 from app.models.user import User
+from app.config import settings
 
 router = APIRouter()
 
+IMPORT_READ_CHUNK = 1024 * 1024
 
-@router.get("/", response_model=List[UserResponse])
-def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+
+@router.get("/", response_model=UserPage)
+async def read_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    sort: str = Query("id", pattern=f"^({'|'.join(SORT_COLUMNS)})$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    filters: UserFilter = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    version, changed_at = await get_users_version(db)
+    etag = make_etag("users", version, request.url.query)
+    if is_not_modified(request, etag, changed_at):
+        return not_modified(etag, changed_at)
+    
+    page = await get_users(
+        db, limit=limit, cursor=cursor, sort=sort, descending=order == "desc", filters=filters
+    )
+    total = await count_users(db, filters)
+    set_validators(response, etag, changed_at)
+    return {
+        "items": page.items,
+        "total": total,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def _export_csv(filters: UserFilter) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in EXPORT_COLUMNS])
+    async for batch in stream_users(filters, batch_size=settings.EXPORT_BATCH_SIZE):
+        writer.writerows([_export_value(value) for value in row.values()] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _export_ndjson(filters: UserFilter) -> AsyncIterator[str]:
+    async for batch in stream_users(filters, batch_size=settings.EXPORT_BATCH_SIZE):
+        yield "".join(
+            json.dumps({key: _export_value(value) for key, value in row.items()}) + "\n"
+            for row in batch
+        )
+
+
+@router.get("/export")
+async def export_users(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: UserFilter = Depends(),
     current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    if format == "csv":
+        body, media_type = _export_csv(filters), "text/csv"
+    else:
+        body, media_type = _export_ndjson(filters), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="participants.{format}"'},
+    )
+
+
+async def _read_import_upload(file: UploadFile) -> bytes:
+    """Read the upload in chunks, refusing it once it passes IMPORT_MAX_BYTES"""
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Import file must be at most {settings.IMPORT_MAX_BYTES // (1024 * 1024)} MB",
+    )
+    if file.size is not None and file.size > settings.IMPORT_MAX_BYTES:
+        raise too_large
+
+    content = bytearray()
+    while True:
+        chunk = await file.read(IMPORT_READ_CHUNK)
+        if not chunk:
+            break
+        content += chunk
+        if len(content) > settings.IMPORT_MAX_BYTES:
+            raise too_large
+    return bytes(content)
+
+
+@router.post("/import", response_model=ImportReport)
+async def import_users_file(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_organizer),
 ) -> Any:
-    users = get_users(db, skip=skip, limit=limit)
-    return users
+    file_format = "json" if (file.filename or "").lower().endswith(".json") else "csv"
+    content = await _read_import_upload(file)
+    try:
+        rows = parse_import_file(content, file_format)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse import file: {str(e)}",
+        )
+    
+    return await import_users(db, rows)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def read_user(
+async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    
+    etag = make_etag("user", user.id, user.updated_at)
+    if is_not_modified(request, etag, user.updated_at):
+        return not_modified(etag, user.updated_at)
+    
+    set_validators(response, etag, user.updated_at)
     return user
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user_data(
+async def update_user_data(
     user_id: int,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ) -> Any:
     if current_user.id != user_id:
@@ -51,7 +176,7 @@ def update_user_data(
             detail="Not authorized to update this user's data",
         )
     
-    updated_user = update_user(db, user_id, user_data)
+    updated_user = await update_user(db, user_id, user_data)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
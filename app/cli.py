@@ -0,0 +1,133 @@
+"""Command line tools for organizers.
+
+Usage:
+    python -m app.cli import-users participants.csv [--report report.json]
+    python -m app.cli print-badges badges/ [--zip badges.zip] [--workers 4] [--restart]
+    python -m app.cli rebuild-stats
+    python -m app.cli build-assets
+    python -m app.cli serve [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal, dispose_engines, init_db
+from app.core.bulk_import import parse_import_file, import_users
+from app.core.assets import asset_manifest
+from app.core.badge_print import BadgePrintJob
+from app.crud.stats import rebuild_participant_stats
+
+
+async def _import_users(path: Path, report_path: Path = None) -> int:
+    file_format = "json" if path.suffix.lower() == ".json" else "csv"
+    rows = parse_import_file(path.read_bytes(), file_format)
+
+    async with AsyncSessionLocal() as db:
+        report = await import_users(db, rows)
+    await dispose_engines()
+
+    print(f"Imported {report.created} of {report.total} rows, {report.failed} failed")
+    for error in report.errors[:20]:
+        print(f"  row {error.row} ({error.email}): {error.errors}")
+    if report.failed > 20:
+        print(f"  ... and {report.failed - 20} more")
+
+    if report_path:
+        report_path.write_text(json.dumps(report.model_dump(), indent=2))
+        print(f"Full report written to {report_path}")
+
+    return 0 if not report.failed else 1
+
+
+async def _print_badges(out_dir: Path, zip_path: Path = None, workers: int = None, restart: bool = False) -> int:
+    job = BadgePrintJob(out_dir, workers=workers or settings.BADGE_PRINT_WORKERS)
+    try:
+        job.load(restart)
+    except ValueError as e:
+        print(f"{e} (--restart discards them)")
+        return 2
+
+    already = job.manifest["badges"]
+    if already:
+        print(f"Resuming after {already} badges already printed in {out_dir}")
+    started = time.monotonic()
+
+    def report(done: int, total: int) -> None:
+        elapsed = time.monotonic() - started
+        rate = (done - already) / elapsed if elapsed else 0
+        eta = f", about {(total - done) / rate:.0f}s left" if rate else ""
+        print(f"  {done}/{total} badges ({done / total:.0%}), {rate:.0f}/s{eta}", flush=True)
+
+    try:
+        printed = await job.run(report)
+    finally:
+        await dispose_engines()
+
+    print(f"Printed {printed} badges in {time.monotonic() - started:.1f}s; "
+          f"{len(job.manifest['sheets'])} sheets in {out_dir}")
+    if zip_path:
+        print(f"Sheets bundled into {job.pack(zip_path)}")
+    return 0
+
+
+async def _rebuild_stats() -> int:
+    async with AsyncSessionLocal() as db:
+        total = await rebuild_participant_stats(db)
+    await dispose_engines()
+    print(f"Participant statistics rebuilt for {total} participants")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import-users", help="Bulk import participants from CSV or JSON")
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument("--report", type=Path, help="Write the per-row error report as JSON")
+
+    badges_parser = subparsers.add_parser("print-badges", help="Render printable badge sheets (PDF)")
+    badges_parser.add_argument("out_dir", type=Path, help="Directory for the sheet PDFs and progress.json")
+    badges_parser.add_argument("--zip", type=Path, help="Also bundle all sheets into this ZIP")
+    badges_parser.add_argument("--workers", type=int, help="Render processes (default BADGE_PRINT_WORKERS)")
+    badges_parser.add_argument("--restart", action="store_true", help="Discard earlier progress and start over")
+
+    subparsers.add_parser("rebuild-stats", help="Recount the participant statistics from scratch")
+
+    subparsers.add_parser("build-assets", help="Fingerprint and precompress the static files")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the production server")
+    serve_parser.add_argument("--workers", type=int, help="Worker processes (default SERVER_WORKERS)")
+    serve_parser.add_argument("--host", help="Bind address (default SERVER_HOST)")
+    serve_parser.add_argument("--port", type=int, help="Port (default SERVER_PORT)")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from app.server import serve
+        return serve(args.workers, args.host, args.port)
+    if args.command == "build-assets":
+        asset_manifest.build()
+        for path, url in sorted(asset_manifest.urls.items()):
+            print(f"{path} -> {url}")
+        return 0
+
+    init_db()
+    if args.command == "import-users":
+        return asyncio.run(_import_users(args.file, args.report))
+    if args.command == "rebuild-stats":
+        return asyncio.run(_rebuild_stats())
+    if args.command == "print-badges":
+        try:
+            return asyncio.run(_print_badges(args.out_dir, args.zip, args.workers, args.restart))
+        except KeyboardInterrupt:
+            print("Interrupted; run the same command again to continue where it stopped")
+            return 130
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,10 +13,125 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.environ.get(
         "DATABASE_URL", "sqlite:///./conference.db"
     )
-    
+
+    # Database connection pool settings
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Read-only sessions (GET handlers) use their own pool; point DATABASE_READ_URL
+    # at a replica to move them off the primary (empty = same database)
+    DATABASE_READ_URL: str = os.environ.get("DATABASE_READ_URL", "")
+    DB_READ_POOL_SIZE: int = int(os.environ.get("DB_READ_POOL_SIZE", "20"))
+
+    # SQLite pragmas applied to every new connection; SQLITE_PROFILE "default" skips them
+    SQLITE_PROFILE: str = os.environ.get("SQLITE_PROFILE", "production")
+    SQLITE_JOURNAL_MODE: str = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB: int = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
     CORS_ORIGINS: List[str] = ["*"]
     
-    LOGIN_RATE_LIMIT: int = 5
+    # Comma-separated emails of the organizer accounts (agenda, check-in, statistics)
+    ORGANIZER_EMAILS: str = os.environ.get("ORGANIZER_EMAILS", "")
+    
+    LOGIN_RATE_LIMIT: int = int(os.environ.get("LOGIN_RATE_LIMIT", "5"))
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = int(os.environ.get("LOGIN_RATE_LIMIT_PER_ACCOUNT", "10"))
+    LOGIN_RATE_LIMIT_WINDOW: int = int(os.environ.get("LOGIN_RATE_LIMIT_WINDOW", "60"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+    
+    # Cache of authenticated users; set USER_CACHE_URL (redis://...) to share it between workers
+    USER_CACHE_TTL: int = int(os.environ.get("USER_CACHE_TTL", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.environ.get("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_URL: str = os.environ.get("USER_CACHE_URL", "")
+    
+    # Templates: bytecode cache location, auto-reload (development only) and fragment cache
+    TEMPLATE_CACHE_DIR: str = os.environ.get("TEMPLATE_CACHE_DIR", ".cache/templates")
+    TEMPLATE_AUTO_RELOAD: bool = os.environ.get("TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+    FRAGMENT_CACHE_TTL: int = int(os.environ.get("FRAGMENT_CACHE_TTL", "30"))
+    FRAGMENT_CACHE_MAX_SIZE: int = int(os.environ.get("FRAGMENT_CACHE_MAX_SIZE", "1000"))
+    
+    # Response compression for HTML and JSON
+    GZIP_ENABLED: bool = os.environ.get("GZIP_ENABLED", "true").lower() == "true"
+    GZIP_MINIMUM_SIZE: int = int(os.environ.get("GZIP_MINIMUM_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.environ.get("GZIP_LEVEL", "6"))
+    
+    # Logging: LOG_FORMAT is "text" or "json"; LOG_LEVELS sets per-logger levels
+    # ("app.web=WARNING,sqlalchemy.engine=INFO"); LOG_SAMPLE_RATES keeps only a
+    # fraction of records tagged with extra={"sample": key} ("page_view=0.1")
+    LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.environ.get("LOG_FORMAT", "text")
+    LOG_LEVELS: str = os.environ.get("LOG_LEVELS", "")
+    LOG_SAMPLE_RATES: str = os.environ.get("LOG_SAMPLE_RATES", "")
+    LOG_QUEUE_SIZE: int = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    
+    # Metrics: set METRICS_DIR to a directory shared by all workers to aggregate them
+    METRICS_ENABLED: bool = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DIR: str = os.environ.get("METRICS_DIR", "")
+    METRICS_FLUSH_INTERVAL: int = int(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+    
+    # Static assets: where fingerprinted/precompressed copies are written
+    STATIC_BUILD_DIR: str = os.environ.get("STATIC_BUILD_DIR", ".cache/static")
+    STATIC_MAX_AGE: int = int(os.environ.get("STATIC_MAX_AGE", "31536000"))
+    
+    # Production server (python -m app.cli serve); SERVER_LIMIT_CONCURRENCY=0 means no limit.
+    # Keep SERVER_KEEP_ALIVE above the idle timeout of any proxy in front of the app.
+    SERVER_HOST: str = os.environ.get("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.environ.get("SERVER_PORT", "8000"))
+    SERVER_WORKERS: int = int(os.environ.get("SERVER_WORKERS", str(os.cpu_count() or 1)))
+    SERVER_BACKLOG: int = int(os.environ.get("SERVER_BACKLOG", "2048"))
+    SERVER_KEEP_ALIVE: int = int(os.environ.get("SERVER_KEEP_ALIVE", "75"))
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_LIMIT_CONCURRENCY: int = int(os.environ.get("SERVER_LIMIT_CONCURRENCY", "0"))
+    SERVER_FORWARDED_ALLOW_IPS: str = os.environ.get("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+    
+    # Profile pictures: content-addressed thumbnails under AVATAR_DIR, rendered on a thread pool
+    AVATAR_DIR: str = os.environ.get("AVATAR_DIR", "media/avatars")
+    AVATAR_MAX_BYTES: int = int(os.environ.get("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+    AVATAR_MAX_PIXELS: int = int(os.environ.get("AVATAR_MAX_PIXELS", "40000000"))
+    AVATAR_WORKERS: int = int(os.environ.get("AVATAR_WORKERS", "2"))
+    AVATAR_QUEUE_SIZE: int = int(os.environ.get("AVATAR_QUEUE_SIZE", "16"))
+    
+    # Badge check-in: scans are answered from memory and written in batches
+    CHECKIN_BATCH_SIZE: int = int(os.environ.get("CHECKIN_BATCH_SIZE", "500"))
+    CHECKIN_FLUSH_INTERVAL: float = float(os.environ.get("CHECKIN_FLUSH_INTERVAL", "0.5"))
+    CHECKIN_MAX_RETRIES: int = int(os.environ.get("CHECKIN_MAX_RETRIES", "5"))
+    CHECKIN_SYNC_MAX_SCANS: int = int(os.environ.get("CHECKIN_SYNC_MAX_SCANS", "10000"))
+    
+    # Printable badges (python -m app.cli print-badges): BADGE_SHEET_SIZE badges per sheet PDF,
+    # rendered on BADGE_PRINT_WORKERS processes. Pillow's built-in font only covers Latin
+    # scripts; point BADGE_FONT at a TrueType file for other alphabets
+    BADGE_PRINT_WORKERS: int = int(os.environ.get("BADGE_PRINT_WORKERS", str(os.cpu_count() or 2)))
+    BADGE_SHEET_SIZE: int = int(os.environ.get("BADGE_SHEET_SIZE", "96"))
+    BADGE_PRINT_DPI: int = int(os.environ.get("BADGE_PRINT_DPI", "300"))
+    BADGE_FONT: str = os.environ.get("BADGE_FONT", "")
+    
+    USERS_PAGE_SIZE: int = int(os.environ.get("USERS_PAGE_SIZE", "50"))
+    # Nationalities and organizations listed by name on /stats; the rest are summed as "other"
+    STATS_TOP_VALUES: int = int(os.environ.get("STATS_TOP_VALUES", "15"))
+    EXPORT_BATCH_SIZE: int = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+    
+    # Bulk import settings
+    IMPORT_BATCH_SIZE: int = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+    IMPORT_HASH_WORKERS: int = int(os.environ.get("IMPORT_HASH_WORKERS", str(os.cpu_count() or 2)))
+    IMPORT_MAX_BYTES: int = int(os.environ.get("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+    
+    # Password hashing pool settings
+    PASSWORD_HASH_WORKERS: int = int(os.environ.get("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    
+    # Admission control for the bcrypt routes (registration, login, password reset), per worker:
+    # ADMISSION_MAX_ACTIVE run at once, ADMISSION_QUEUE_SIZE more wait up to ADMISSION_MAX_WAIT
+    # seconds; once the queue is half full, new visitors of /register go to the waiting room
+    ADMISSION_ENABLED: bool = os.environ.get("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_ACTIVE: int = int(os.environ.get("ADMISSION_MAX_ACTIVE", str(os.cpu_count() or 2)))
+    ADMISSION_QUEUE_SIZE: int = int(os.environ.get("ADMISSION_QUEUE_SIZE", "32"))
+    ADMISSION_MAX_WAIT: float = float(os.environ.get("ADMISSION_MAX_WAIT", "15"))
+    ADMISSION_PASS_TTL: int = int(os.environ.get("ADMISSION_PASS_TTL", "900"))
     
     USE_HTTPS: bool = os.environ.get("USE_HTTPS", "false").lower() == "true"
     
@@ -27,9 +142,21 @@ class Settings(BaseSettings):
     EMAIL_PASSWORD: str = os.environ.get("EMAIL_PASSWORD", "")
     EMAIL_FROM: str = os.environ.get("EMAIL_FROM", "noreply@conference.com")
     EMAIL_USE_TLS: bool = os.environ.get("EMAIL_USE_TLS", "true").lower() == "true"
+    EMAIL_USE_AUTH: bool = os.environ.get("EMAIL_USE_AUTH", "true").lower() == "true"
+    EMAIL_TIMEOUT: int = int(os.environ.get("EMAIL_TIMEOUT", "30"))
+    
+    # Outbound mail queue settings
+    EMAIL_WORKERS: int = int(os.environ.get("EMAIL_WORKERS", "2"))
+    EMAIL_QUEUE_SIZE: int = int(os.environ.get("EMAIL_QUEUE_SIZE", "1000"))
+    EMAIL_MAX_RETRIES: int = int(os.environ.get("EMAIL_MAX_RETRIES", "3"))
+    EMAIL_RETRY_BACKOFF: float = float(os.environ.get("EMAIL_RETRY_BACKOFF", "2.0"))
     
     # Password reset settings
     RESET_TOKEN_EXPIRE_MINUTES: int = 15
+    RESET_CODE_MAX_ATTEMPTS: int = int(os.environ.get("RESET_CODE_MAX_ATTEMPTS", "5"))
+    RESET_CODE_SWEEP_INTERVAL: int = int(os.environ.get("RESET_CODE_SWEEP_INTERVAL", "300"))
+    # "database" shares codes between workers, "memory" keeps them in-process
+    RESET_CODE_BACKEND: str = os.environ.get("RESET_CODE_BACKEND", "database")
     
     class Config:
         env_file = ".env"
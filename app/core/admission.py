@@ -0,0 +1,347 @@
+from bisect import bisect_left
+from collections import deque
+from http.cookies import SimpleCookie
+from typing import Deque, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+import asyncio
+import logging
+import secrets
+import time
+
+from itsdangerous import BadSignature, TimestampSigner, URLSafeTimedSerializer
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.metrics import admission_rejections, admission_wait_duration
+
+logger = logging.getLogger(__name__)
+
+WAITING_ROOM_PATH = "/waiting"
+PASS_COOKIE = "admission_pass"
+TICKET_MAX_AGE = 24 * 3600
+# How long an unused pass counts as someone about to submit the form
+ENTRY_WINDOW = 120
+
+# Requests that pay for bcrypt; they run through the gate
+GATED_ROUTES = {
+    ("POST", "/register"),
+    ("POST", "/login"),
+    ("POST", "/reset-password"),
+    ("POST", f"{settings.API_V1_STR}/auth/register"),
+    ("POST", f"{settings.API_V1_STR}/auth/login"),
+}
+
+# Pages leading to a gated form; while the gate is crowded, visitors
+# without an admission pass queue in the waiting room before reaching them
+ENTRY_PAGES = {"/register"}
+
+# Where a browser goes back to when its gated form post is refused. The
+# reset form needs its ?email=, so the page it was posted from comes first
+FORM_PAGES = {
+    "/register": "/register",
+    "/login": "/login",
+    "/reset-password": "/forgot-password",
+}
+
+BUSY_MESSAGE = "Server is busy. Please try again in a moment."
+
+
+class AdmissionController:
+    """Bounded concurrency gate with a FIFO waiting room, per worker process.
+
+    At most ``max_active`` gated requests run at once. Up to ``max_queue``
+    more wait for a slot in arrival order (for at most ``max_wait``
+    seconds), and a released slot goes straight to the oldest waiter.
+
+    Passes to the entry pages count against the gate until they are used
+    (or ENTRY_WINDOW passes), so a rush on the form itself is spread out.
+    Beyond that, browsers get a signed ticket for the waiting room. Tickets
+    are admitted in issue order at the rate the gate completes requests:
+    faster while its queue is empty, not at all while it is half full. So
+    admissions follow what the machine actually gets through. A ticket
+    carries its issue time, so a worker it was not issued by admits it once
+    its own older tickets have been let in.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, max_wait: float, pass_ttl: int):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.backlog = max(max_queue // 2, 1)
+        self.pass_ttl = pass_ttl
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Issue times of waiting-room tickets, oldest first; room[:head] have been admitted
+        self.room: List[float] = []
+        self.head = 0
+        self.last_issued = 0.0
+        # Admissions accrued but not yet used, and when they were last accrued
+        self.credit = 0.0
+        self.advanced_at = time.monotonic()
+        self.completed: Deque[float] = deque(maxlen=64)
+        # When the passes not yet used were issued, oldest first
+        self.entries: Deque[float] = deque()
+        self.tickets = URLSafeTimedSerializer(settings.SECRET_KEY, salt="admission-ticket")
+        self.passes = TimestampSigner(settings.SECRET_KEY, salt="admission-pass")
+
+    @property
+    def waiting(self) -> int:
+        return len(self.room) - self.head
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False when the queue is full or the wait times out"""
+        if self.active < self.max_active and not self.waiters:
+            self.active += 1
+            return True
+
+        if len(self.waiters) >= self.max_queue:
+            admission_rejections.inc("queue_full")
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait((future,), timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that was already handed over
+            if future.done():
+                self.release()
+            else:
+                self.waiters.remove(future)
+            raise
+        admission_wait_duration.observe(time.perf_counter() - started)
+
+        if future.done():
+            return True
+        self.waiters.remove(future)
+        admission_rejections.inc("timeout")
+        return False
+
+    def release(self) -> None:
+        self.completed.append(time.monotonic())
+        if self.waiters:
+            # Hand the slot over; active stays the same
+            self.waiters.popleft().set_result(None)
+        else:
+            self.active -= 1
+
+    def _advance(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.advanced_at
+        self.advanced_at = now
+        if not self.waiting or len(self.waiters) >= self.backlog:
+            self.credit = 0.0
+            return
+
+        rate = self.throughput()
+        if not self.waiters:
+            # The gate has spare capacity: let people in faster than it completes
+            rate = rate * 1.5 + self.max_active
+        self.credit = min(self.credit + elapsed * rate, self.backlog)
+        admitted = min(int(self.credit), self.waiting)
+        if admitted:
+            self.credit -= admitted
+            self.head += admitted
+            if self.head > 1024 and self.head * 2 > len(self.room):
+                del self.room[:self.head]
+                self.head = 0
+
+    def entered(self) -> None:
+        """A pass holder reached a gated route"""
+        if self.entries:
+            self.entries.popleft()
+
+    def crowded(self) -> bool:
+        """Whether new visitors of an entry page should queue in the waiting room"""
+        self._advance()
+        expire_before = time.monotonic() - ENTRY_WINDOW
+        while self.entries and self.entries[0] < expire_before:
+            self.entries.popleft()
+        return (
+            self.waiting > 0
+            or len(self.waiters) >= self.backlog
+            or len(self.entries) >= self.max_active + self.max_queue
+        )
+
+    def take_ticket(self, next_path: str) -> str:
+        issued_at = max(time.time(), self.last_issued + 1e-6)
+        self.last_issued = issued_at
+        self.room.append(issued_at)
+        return self.tickets.dumps([issued_at, next_path])
+
+    def load_ticket(self, token: str) -> Optional[Tuple[float, str]]:
+        try:
+            issued_at, next_path = self.tickets.loads(token, max_age=TICKET_MAX_AGE)
+        except (BadSignature, ValueError, TypeError):
+            return None
+        if next_path not in ENTRY_PAGES:
+            return None
+        return float(issued_at), next_path
+
+    def position(self, issued_at: float) -> int:
+        """Place of a ticket in the queue (1 = next); 0 once it is admitted"""
+        self.crowded()
+        index = bisect_left(self.room, issued_at, self.head)
+        if index < len(self.room) and self.room[index] == issued_at:
+            return index - self.head + 1
+        # Already admitted, or issued by another worker: it waits only
+        # for this worker's tickets that are older
+        return index - self.head
+
+    def throughput(self) -> float:
+        """Gated requests completed per second, over the last few dozen"""
+        if len(self.completed) < 2 or time.monotonic() - self.completed[-1] > 60:
+            return 0.0
+        span = self.completed[-1] - self.completed[0]
+        return (len(self.completed) - 1) / span if span > 0 else 0.0
+
+    def estimated_wait(self, position: int) -> Optional[int]:
+        rate = self.throughput()
+        return int(position / rate) + 1 if rate else None
+
+    def issue_pass(self) -> str:
+        """Set-Cookie value for a pass to the entry pages, valid for pass_ttl seconds"""
+        self.entries.append(time.monotonic())
+        cookie: SimpleCookie = SimpleCookie()
+        cookie[PASS_COOKIE] = self.passes.sign(secrets.token_urlsafe(8)).decode()
+        morsel = cookie[PASS_COOKIE]
+        morsel["max-age"] = self.pass_ttl
+        morsel["path"] = "/"
+        morsel["httponly"] = True
+        morsel["samesite"] = "lax"
+        if settings.USE_HTTPS:
+            morsel["secure"] = True
+        return cookie.output(header="").strip()
+
+    def has_pass(self, value: Optional[str]) -> bool:
+        if not value:
+            return False
+        try:
+            self.passes.unsign(value, max_age=self.pass_ttl)
+        except BadSignature:
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "waiting_room": self.waiting,
+            "entries": len(self.entries),
+            "throughput": round(self.throughput(), 2),
+        }
+
+
+admission = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE,
+    max_queue=settings.ADMISSION_QUEUE_SIZE,
+    max_wait=settings.ADMISSION_MAX_WAIT,
+    pass_ttl=settings.ADMISSION_PASS_TTL,
+)
+
+
+def _accepts_html(scope: Scope) -> bool:
+    for key, value in scope.get("headers", []):
+        if key == b"accept":
+            return b"text/html" in value
+    return False
+
+
+def _form_page(scope: Scope, path: str) -> str:
+    """The page a refused form post goes back to"""
+    headers = Headers(scope=scope)
+    referer = urlsplit(headers.get("referer", ""))
+    if referer.netloc == headers.get("host") and referer.path == path:
+        return f"{path}?{referer.query}" if referer.query else path
+    return FORM_PAGES.get(path, path)
+
+
+class AdmissionMiddleware:
+    """Puts the gated routes behind the admission controller (plain ASGI).
+
+    Entry pages are served with an admission pass cookie. While the gate is
+    crowded, visitors without a pass are sent to the waiting room instead.
+    Gated requests wait for a slot before the app sees them (their body is
+    not read yet); when none frees up in time, browsers go back to the form
+    with a flash message (so it must run inside SessionMiddleware) and API
+    clients get 503 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController = admission,
+        gated_routes: Iterable[Tuple[str, str]] = GATED_ROUTES,
+        entry_pages: Iterable[str] = ENTRY_PAGES,
+    ):
+        self.app = app
+        self.controller = controller
+        self.gated_routes = set(gated_routes)
+        self.entry_pages = set(entry_pages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        gated = (scope["method"], path) in self.gated_routes
+        # Only page views queue in the waiting room; a form post would lose what was typed
+        entry = scope["method"] in ("GET", "HEAD") and path in self.entry_pages
+        if not gated and not entry:
+            await self.app(scope, receive, send)
+            return
+
+        has_pass = self.controller.has_pass(HTTPConnection(scope).cookies.get(PASS_COOKIE))
+        if entry and not has_pass and self.controller.crowded():
+            await self._to_waiting_room(scope, receive, send, path)
+            return
+
+        # The pass rides on the entry page's response, not on a waiting-room redirect
+        downstream = self._with_pass(send) if entry and not has_pass else send
+
+        if not gated:
+            await self.app(scope, receive, downstream)
+            return
+
+        if has_pass:
+            self.controller.entered()
+
+        if not await self.controller.acquire():
+            logger.warning(f"Admission refused for {scope['method']} {path}: {self.controller.stats()}")
+            if _accepts_html(scope) and not path.startswith(settings.API_V1_STR):
+                scope["session"]["messages"] = [{"text": BUSY_MESSAGE, "type": "warning"}]
+                await RedirectResponse(_form_page(scope, path), status_code=303)(scope, receive, send)
+            else:
+                response = JSONResponse(
+                    {"detail": BUSY_MESSAGE},
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, downstream)
+        finally:
+            self.controller.release()
+
+    async def _to_waiting_room(self, scope: Scope, receive: Receive, send: Send, next_path: str) -> None:
+        ticket = self.controller.take_ticket(next_path)
+        url = f"{WAITING_ROOM_PATH}?{urlencode({'ticket': ticket})}"
+        await RedirectResponse(url, status_code=303)(scope, receive, send)
+
+    def _with_pass(self, send: Send) -> Send:
+        # Issued now, not when the response starts, so concurrent visitors see it counted
+        cookie = self.controller.issue_pass()
+
+        async def send_with_pass(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        return send_with_pass
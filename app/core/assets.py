@@ -0,0 +1,220 @@
+from dataclasses import dataclass, field
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, Optional
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "app/static"
+MANIFEST_NAME = "manifest.json"
+
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".map", ".svg", ".txt", ".html", ".xml"}
+
+
+@dataclass
+class Asset:
+    path: str
+    digest: str
+    media_type: str
+    stat_result: os.stat_result
+    # content-coding -> (relative path, stat) of the precompressed variant
+    variants: Dict[str, tuple] = field(default_factory=dict)
+
+
+def _write_once(path: Path, data: bytes) -> None:
+    """Write a build output unless it already exists; safe with concurrent workers"""
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _compress(encoding: str, data: bytes) -> Optional[bytes]:
+    if encoding == "br":
+        return brotli.compress(data, quality=11) if brotli is not None else None
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class AssetManifest:
+    """Content-hashed copies of the files under app/static.
+
+    ``build()`` writes ``name.<hash>.ext`` plus ``.br``/``.gz`` variants to
+    STATIC_BUILD_DIR (brotli only when the package is installed), and a
+    manifest that ``load()`` reads back without hashing anything; ``url()``
+    maps a source path to its fingerprinted URL.
+    """
+
+    encodings = (("br", ".br"), ("gzip", ".gz"))
+
+    def __init__(self, source_dir: str, build_dir: str, url_prefix: str = "/static"):
+        self.source_dir = Path(source_dir)
+        self.build_dir = Path(build_dir)
+        self.url_prefix = url_prefix
+        self.urls: Dict[str, str] = {}
+        self.assets: Dict[str, Asset] = {}
+
+    def build(self) -> None:
+        urls, assets = {}, {}
+        for source in sorted(self.source_dir.rglob("*")):
+            if not source.is_file():
+                continue
+
+            data = source.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            relative = source.relative_to(self.source_dir)
+            hashed = relative.with_name(f"{relative.stem}.{digest}{relative.suffix}").as_posix()
+            target = self.build_dir / hashed
+            _write_once(target, data)
+
+            asset = Asset(
+                path=hashed,
+                digest=digest,
+                media_type=guess_type(source.name)[0] or "application/octet-stream",
+                stat_result=target.stat(),
+            )
+            if relative.suffix in COMPRESSIBLE_SUFFIXES:
+                for encoding, suffix in self.encodings:
+                    variant = target.with_name(target.name + suffix)
+                    if not variant.exists():
+                        compressed = _compress(encoding, data)
+                        # Not worth serving a variant that isn't smaller
+                        if compressed is None or len(compressed) >= len(data):
+                            continue
+                        _write_once(variant, compressed)
+                    asset.variants[encoding] = (hashed + suffix, variant.stat())
+
+            urls[relative.as_posix()] = f"{self.url_prefix}/{hashed}"
+            assets[hashed] = asset
+
+        self.urls, self.assets = urls, assets
+        self._save()
+        logger.info(f"Built {len(assets)} static assets into {self.build_dir}")
+
+    def _save(self) -> None:
+        manifest = {
+            "urls": self.urls,
+            "assets": {
+                hashed: {
+                    "digest": asset.digest,
+                    "media_type": asset.media_type,
+                    "variants": {encoding: path for encoding, (path, _) in asset.variants.items()},
+                }
+                for hashed, asset in self.assets.items()
+            },
+        }
+        path = self.build_dir / MANIFEST_NAME
+        tmp = path.with_name(f".{MANIFEST_NAME}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, path)
+
+    def load(self) -> None:
+        """Read the manifest written by an earlier ``build()``; builds if there is none"""
+        try:
+            manifest = json.loads((self.build_dir / MANIFEST_NAME).read_text())
+            assets = {}
+            for hashed, entry in manifest["assets"].items():
+                asset = Asset(
+                    path=hashed,
+                    digest=entry["digest"],
+                    media_type=entry["media_type"],
+                    stat_result=(self.build_dir / hashed).stat(),
+                )
+                for encoding, path in entry["variants"].items():
+                    asset.variants[encoding] = (path, (self.build_dir / path).stat())
+                assets[hashed] = asset
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Static asset manifest unusable ({str(e)}); building the assets")
+            self.build()
+            return
+        self.urls, self.assets = manifest["urls"], assets
+
+    def url(self, path: str) -> str:
+        path = path.lstrip("/")
+        return self.urls.get(path, f"{self.url_prefix}/{path}")
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        return self.assets.get(path.replace(os.sep, "/"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Serves fingerprinted assets as immutable, picking a precompressed
+    variant by Accept-Encoding. Unhashed paths fall back to the source
+    files and must be revalidated.
+    """
+
+    def __init__(self, manifest: AssetManifest, max_age: int, **kwargs):
+        super().__init__(directory=str(manifest.source_dir), **kwargs)
+        self.manifest = manifest
+        self.cache_control = f"public, max-age={max_age}, immutable"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.lookup(path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", "no-cache")
+            return response
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        headers = {"Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        file_path, stat_result = asset.path, asset.stat_result
+        for encoding, _ in self.manifest.encodings:
+            if encoding in asset.variants and accepted.get(encoding, 0) > 0:
+                file_path, stat_result = asset.variants[encoding]
+                headers["Content-Encoding"] = encoding
+                break
+
+        # The content hash identifies the representation; the coding is part of it
+        headers["ETag"] = f'"{asset.digest}-{headers.get("Content-Encoding", "identity")}"'
+        response = FileResponse(
+            self.manifest.build_dir / file_path,
+            headers=headers,
+            media_type=asset.media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+asset_manifest = AssetManifest(STATIC_DIR, settings.STATIC_BUILD_DIR)
+
+
+def asset_url(path: str) -> str:
+    """Jinja helper: ``{{ asset_url('css/style.css') }}``"""
+    return asset_manifest.url(path)
@@ -0,0 +1,291 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.config import settings
+
+try:
+    from multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    MultipartParser = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+AVATAR_URL_PREFIX = "/media/avatars"
+
+# Square thumbnails: "sm" for the participant list, "md" for the profile page
+THUMBNAIL_SIZES = {"sm": 64, "md": 256}
+
+ACCEPTED_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+
+FIELD_MAX_BYTES = 4096
+
+
+def _make_thumbnails(source: Path, targets: Dict[int, Path], max_pixels: int) -> None:
+    """Decode ``source`` once and write a JPEG thumbnail per size"""
+    with Image.open(source) as image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ValueError(f"Image is too large ({width}x{height})")
+        # Lets the JPEG decoder downscale while decoding
+        image.draft("RGB", (max(targets) * 2, max(targets) * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        for size, target in sorted(targets.items(), reverse=True):
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            thumbnail.save(tmp, "JPEG", quality=85, optimize=True, progressive=True)
+            os.replace(tmp, target)
+
+
+class _UploadParser:
+    """Streams one multipart request: small fields are kept in memory, the
+    file part goes straight to a temporary file while being hashed.
+    """
+
+    def __init__(self, tmp_path: Path, max_bytes: int):
+        self.tmp_path = tmp_path
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.file = None
+        self.content_type = ""
+        self.pending: list = []
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._name = ""
+        self._data = b""
+        self._is_file = False
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._data = b""
+        self._is_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            if self.file is not None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only one file can be uploaded")
+            self._is_file = True
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip().lower()
+            if self.content_type not in ACCEPTED_TYPES:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="Upload a JPEG, PNG, WebP or GIF image",
+                )
+            self.file = open(self.tmp_path, "wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if not self._is_file:
+            self._data += chunk
+            if len(self._data) > FIELD_MAX_BYTES:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Form field is too large")
+            return
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image must be at most {self.max_bytes // (1024 * 1024)} MB",
+            )
+        self.digest.update(chunk)
+        self.pending.append(chunk)
+
+    def on_part_end(self) -> None:
+        if not self._is_file:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
+
+    def write_pending(self) -> None:
+        """Flush the file chunks parsed so far; runs on a worker thread"""
+        for chunk in self.pending:
+            self.file.write(chunk)
+        self.pending = []
+
+
+class AvatarStore:
+    """Profile pictures stored by the SHA-256 of the uploaded file.
+
+    Each upload is reduced to square JPEG thumbnails written to
+    ``<root>/<hash[:2]>/<hash>-<size>.jpg``; uploading a file that is
+    already stored skips decoding altogether. The hash is what the user
+    row keeps, so URLs never change content and can be cached forever.
+
+    Thumbnails are rendered on a bounded thread pool (Pillow releases the
+    GIL while decoding and resampling); when it is saturated, new uploads
+    are rejected with 503 rather than queued without limit.
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_pixels: int, max_workers: int, queue_size: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.max_pending = max_workers + queue_size
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="avatar-thumbnails")
+
+    def _paths(self, digest: str) -> Dict[int, Path]:
+        return {
+            size: self.root / digest[:2] / f"{digest}-{size}.jpg"
+            for size in THUMBNAIL_SIZES.values()
+        }
+
+    def exists(self, digest: str) -> bool:
+        return all(path.exists() for path in self._paths(digest).values())
+
+    async def receive(self, request: Request) -> Tuple[Dict[str, str], Optional[str], Path]:
+        """Stream the request body to a temporary file.
+
+        Returns the form fields, the hex digest of the file part (None when
+        no file was sent) and the temporary path, which the caller must
+        pass to ``store`` or ``discard``.
+        """
+        if MultipartParser is None:
+            raise RuntimeError("python-multipart is required for avatar uploads")
+
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a multipart form")
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes + FIELD_MAX_BYTES * 4:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image must be at most {self.max_bytes // (1024 * 1024)} MB",
+            )
+
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir / f"{secrets.token_hex(16)}.upload"
+        upload = _UploadParser(tmp_path, self.max_bytes)
+        parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": upload.on_part_begin,
+            "on_part_data": upload.on_part_data,
+            "on_part_end": upload.on_part_end,
+            "on_header_field": upload.on_header_field,
+            "on_header_value": upload.on_header_value,
+            "on_header_end": upload.on_header_end,
+            "on_headers_finished": upload.on_headers_finished,
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if upload.pending:
+                    await run_in_threadpool(upload.write_pending)
+            parser.finalize()
+        except BaseException:
+            if upload.file is not None:
+                upload.file.close()
+            self.discard(tmp_path)
+            raise
+        if upload.file is not None:
+            upload.file.close()
+
+        digest = upload.digest.hexdigest() if upload.file is not None and upload.size else None
+        return upload.fields, digest, tmp_path
+
+    async def store(self, digest: str, tmp_path: Path) -> bool:
+        """Render the thumbnails for an upload; returns False when they already existed"""
+        try:
+            if self.exists(digest):
+                return False
+            if Image is None:
+                raise RuntimeError("Pillow is required for avatar uploads")
+            if self.pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server is busy. Please try again in a moment.",
+                    headers={"Retry-After": "1"},
+                )
+
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    self.executor, _make_thumbnails, tmp_path, self._paths(digest), self.max_pixels
+                )
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                logger.warning(f"Rejected avatar upload {digest}: {str(e)}")
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The file is not a valid image")
+            finally:
+                self.pending -= 1
+            return True
+        finally:
+            self.discard(tmp_path)
+
+    def discard(self, tmp_path: Path) -> None:
+        tmp_path.unlink(missing_ok=True)
+
+    def url(self, digest: str, size: str = "sm") -> str:
+        return f"{AVATAR_URL_PREFIX}/{digest[:2]}/{digest}-{THUMBNAIL_SIZES[size]}.jpg"
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class AvatarFiles(StaticFiles):
+    """Serves stored thumbnails; their names are content hashes, so they are immutable"""
+
+    def __init__(self, store: AvatarStore, max_age: int):
+        store.root.mkdir(parents=True, exist_ok=True)
+        super().__init__(directory=str(store.root))
+        self.cache_control = f"public, max-age={max_age}, immutable"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.startswith("tmp"):
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = self.cache_control
+        return response
+
+
+avatar_store = AvatarStore(
+    settings.AVATAR_DIR,
+    max_bytes=settings.AVATAR_MAX_BYTES,
+    max_pixels=settings.AVATAR_MAX_PIXELS,
+    max_workers=settings.AVATAR_WORKERS,
+    queue_size=settings.AVATAR_QUEUE_SIZE,
+)
+
+
+def avatar_url(digest: str, size: str = "sm") -> str:
+    """Jinja helper: ``{{ avatar_url(user.avatar, 'md') }}``"""
+    return avatar_store.url(digest, size)
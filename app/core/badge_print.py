@@ -0,0 +1,248 @@
+"""Printable name badges, rendered on a process pool.
+
+A print job streams participants from the database in id order, renders
+``badges_per_sheet`` of them into each sheet PDF (A4 pages of 2x4 badges)
+in worker processes, and records every finished sheet in ``progress.json``
+in the output directory. Running the job again continues after the last
+recorded participant, so an interrupted job resumes where it stopped and a
+finished one only prints the participants who registered since.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import zipfile
+
+from app.config import settings
+from app.core.database import AsyncReadSessionLocal
+from app.crud.checkin import count_participants_after, stream_badge_print_rows
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "progress.json"
+
+# A4 with 10 mm margins, cut into 2 columns x 4 rows of 95 x 69 mm badges
+PAGE_MM = (210, 297)
+MARGIN_MM = 10
+COLUMNS, ROWS = 2, 4
+BADGES_PER_PAGE = COLUMNS * ROWS
+
+# (row of the badge, height as a fraction of the badge, smallest size in points)
+TEXT_LINES = [(0.18, 0.15, 10), (0.40, 0.15, 10), (0.63, 0.08, 7), (0.78, 0.07, 7)]
+
+# Set in each worker process by _init_worker
+_dpi = 0
+_font_path = ""
+
+
+def _init_worker(dpi: int, font_path: str) -> None:
+    global _dpi, _font_path
+    # Ctrl-C reaches the whole process group; the parent stops the job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _dpi = dpi
+    _font_path = font_path
+
+
+def _px(mm: float) -> int:
+    return round(mm / 25.4 * _dpi)
+
+
+@functools.lru_cache(maxsize=128)
+def _font(size: int):
+    if _font_path:
+        return ImageFont.truetype(_font_path, size)
+    return ImageFont.load_default(size=size)
+
+
+def _fit(draw, text: str, height: int, min_size: int, width: int) -> Tuple[str, Any]:
+    """The largest font (down to ``min_size``) the text fits in; past that, the text is cut"""
+    size = height
+    font = _font(size)
+    while draw.textlength(text, font=font) > width and size > min_size:
+        size = max(min_size, int(size * 0.9))
+        font = _font(size)
+    while len(text) > 1 and draw.textlength(text, font=font) > width:
+        text = text[:-2] + "…"
+    return text, font
+
+
+def _draw_badge(draw, box: Tuple[int, int, int, int], row: Sequence[Any]) -> None:
+    left, top, right, bottom = box
+    # Cut lines
+    draw.rectangle(box, outline=0, width=max(1, _px(0.1)))
+    _, first_name, last_name, organization, position = row
+    width = right - left - 2 * _px(6)
+    height = bottom - top
+    for text, (y, line_height, min_points) in zip((first_name, last_name, organization, position), TEXT_LINES):
+        if not text:
+            continue
+        text, font = _fit(draw, text, round(height * line_height), round(min_points / 72 * _dpi), width)
+        draw.text(((left + right) // 2, top + round(height * y)), text, fill=0, font=font, anchor="mt")
+
+
+def render_sheet(path: str, rows: List[Sequence[Any]]) -> int:
+    """Render participants onto A4 pages and write them as one PDF; returns its size in bytes"""
+    page_size = (_px(PAGE_MM[0]), _px(PAGE_MM[1]))
+    badge_width = (page_size[0] - 2 * _px(MARGIN_MM)) // COLUMNS
+    badge_height = (page_size[1] - 2 * _px(MARGIN_MM)) // ROWS
+
+    pages = []
+    for start in range(0, len(rows), BADGES_PER_PAGE):
+        # Black and white pages are stored CCITT G4 compressed: ~25 KB per page instead of ~450 KB as JPEG
+        page = Image.new("1", page_size, 1)
+        draw = ImageDraw.Draw(page)
+        for i, row in enumerate(rows[start:start + BADGES_PER_PAGE]):
+            left = _px(MARGIN_MM) + (i % COLUMNS) * badge_width
+            top = _px(MARGIN_MM) + (i // COLUMNS) * badge_height
+            _draw_badge(draw, (left, top, left + badge_width, top + badge_height), row)
+        pages.append(page)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        pages[0].save(tmp, "PDF", save_all=True, append_images=pages[1:], resolution=_dpi)
+    finally:
+        # Saving leaves the pages in a reference cycle (through their encoderinfo),
+        # which the garbage collector rarely gets to; free the pixels now
+        for page in pages:
+            page.close()
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class BadgePrintJob:
+    """Renders badges for every participant into sheet PDFs under ``out_dir``.
+
+    Sheets are written by the workers; the manifest is only advanced in
+    sheet order, so after a crash the job redoes at most the sheets that
+    were in flight.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        workers: int = settings.BADGE_PRINT_WORKERS,
+        badges_per_sheet: int = settings.BADGE_SHEET_SIZE,
+        dpi: int = settings.BADGE_PRINT_DPI,
+        font_path: str = settings.BADGE_FONT,
+    ):
+        self.out_dir = out_dir
+        self.workers = workers
+        self.layout = {"badges_per_sheet": badges_per_sheet, "dpi": dpi, "font": font_path}
+        self.manifest_path = out_dir / MANIFEST_NAME
+        self.manifest: Dict[str, Any] = {"layout": self.layout, "last_user_id": 0, "badges": 0, "sheets": []}
+
+    def load(self, restart: bool = False) -> None:
+        """Pick up the manifest of an earlier run, or start over with ``restart``"""
+        if not self.manifest_path.exists():
+            return
+        manifest = json.loads(self.manifest_path.read_text())
+        if restart:
+            for sheet in manifest["sheets"]:
+                (self.out_dir / sheet["file"]).unlink(missing_ok=True)
+            self.manifest_path.unlink()
+            return
+        if manifest["layout"] != self.layout:
+            raise ValueError(
+                f"{self.out_dir} holds badges printed with {manifest['layout']}; "
+                f"use the same settings or start over"
+            )
+        self.manifest = manifest
+
+    def _save(self) -> None:
+        tmp = self.manifest_path.with_name(f".{MANIFEST_NAME}.tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(tmp, self.manifest_path)
+
+    async def _sheets(self):
+        """Yield (sheet file name, rows) for the participants not printed yet"""
+        number = len(self.manifest["sheets"])
+        rows: List[Sequence[Any]] = []
+        async for partition in stream_badge_print_rows(self.manifest["last_user_id"]):
+            for row in partition:
+                rows.append(tuple(row))
+                if len(rows) == self.layout["badges_per_sheet"]:
+                    number += 1
+                    yield f"badges-{number:05d}.pdf", rows
+                    rows = []
+        if rows:
+            yield f"badges-{number + 1:05d}.pdf", rows
+
+    async def run(self, on_progress: Optional[ProgressCallback] = None) -> int:
+        """Print the remaining badges; returns how many were printed in this run"""
+        if Image is None:
+            raise RuntimeError("Printing badges requires Pillow")
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        async with AsyncReadSessionLocal() as db:
+            remaining = await count_participants_after(db, self.manifest["last_user_id"])
+        total = self.manifest["badges"] + remaining
+        printed = 0
+
+        loop = asyncio.get_running_loop()
+        # Spawned rather than forked: the parent runs the database driver's threads
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.layout["dpi"], self.layout["font"]),
+        )
+        in_flight: deque = deque()
+
+        async def finish_oldest() -> None:
+            nonlocal printed
+            name, rows, future = in_flight.popleft()
+            await future
+            self.manifest["sheets"].append(
+                {"file": name, "badges": len(rows), "first_user_id": rows[0][0], "last_user_id": rows[-1][0]}
+            )
+            self.manifest["last_user_id"] = rows[-1][0]
+            self.manifest["badges"] += len(rows)
+            self._save()
+            printed += len(rows)
+            if on_progress:
+                on_progress(self.manifest["badges"], max(total, self.manifest["badges"]))
+
+        try:
+            async for name, rows in self._sheets():
+                future = loop.run_in_executor(pool, render_sheet, str(self.out_dir / name), rows)
+                in_flight.append((name, rows, future))
+                # Enough queued to keep every worker busy, without reading the whole table ahead
+                if len(in_flight) >= 2 * self.workers:
+                    await finish_oldest()
+            while in_flight:
+                await finish_oldest()
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
+            # Sheets already rendering finish; the loop keeps running to collect them
+            await loop.run_in_executor(None, pool.shutdown)
+
+        logger.info(
+            f"Printed {printed} badges into {self.out_dir} "
+            f"({self.manifest['badges']} in {len(self.manifest['sheets'])} sheets in total)"
+        )
+        return printed
+
+    def pack(self, zip_path: Path) -> Path:
+        """Bundle every sheet into one ZIP, written entry by entry and replaced atomically"""
+        tmp = zip_path.with_name(f".{zip_path.name}.tmp")
+        # PDFs are compressed already
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as bundle:
+            for sheet in self.manifest["sheets"]:
+                bundle.write(self.out_dir / sheet["file"], arcname=sheet["file"])
+        os.replace(tmp, zip_path)
+        return zip_path
@@ -0,0 +1,234 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+
+from fastapi import HTTPException, status
+from itsdangerous import BadSignature, Signer
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.checkin import get_badge_entry, insert_check_ins, stream_badge_entries
+
+logger = logging.getLogger(__name__)
+
+# Short enough for a small QR code: "<user id>.<HMAC-SHA256>"
+_signer = Signer(settings.SECRET_KEY, salt="badge", digest_method=hashlib.sha256)
+
+
+def badge_token(user_id: int) -> str:
+    return _signer.sign(str(user_id)).decode()
+
+
+def read_badge_token(token: str) -> Optional[int]:
+    try:
+        return int(_signer.unsign(token))
+    except (BadSignature, ValueError):
+        return None
+
+
+class BadgeEntry:
+    __slots__ = ("name", "organization", "checked_in_at")
+
+    def __init__(self, name: str, organization: str, checked_in_at: Optional[datetime]):
+        self.name = name
+        self.organization = organization
+        self.checked_in_at = checked_in_at
+
+
+class BadgeIndex:
+    """Every participant by id, in memory, so a scan needs no database work.
+
+    Loaded at startup and updated by app.crud.user as participants register
+    or change their details in this worker. Participants it does not know
+    yet (bulk imports, registrations on other workers) are read from the
+    database on their first scan and kept.
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, BadgeEntry] = {}
+        self.checked_in = 0
+
+    async def load(self, batch_size: int = 5000) -> None:
+        entries: Dict[int, BadgeEntry] = {}
+        checked_in = 0
+        async for partition in stream_badge_entries(batch_size):
+            for user_id, first_name, last_name, organization, checked_in_at in partition:
+                entries[user_id] = BadgeEntry(f"{first_name} {last_name}", organization, checked_in_at)
+                checked_in += checked_in_at is not None
+        self.entries = entries
+        self.checked_in = checked_in
+        logger.info(f"Badge index loaded: {len(entries)} participants, {checked_in} checked in")
+
+    def add(self, user: Any) -> None:
+        """Add or refresh a participant, keeping their check-in"""
+        entry = self.entries.get(user.id)
+        if entry is None:
+            self.entries[user.id] = BadgeEntry(user.full_name, user.organization, None)
+        else:
+            entry.name = user.full_name
+            entry.organization = user.organization
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[BadgeEntry]:
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            return entry
+
+        row = await get_badge_entry(db, user_id)
+        if row is None:
+            return None
+        # Another scan may have added it while we waited
+        entry = self.entries.get(user_id)
+        if entry is None:
+            _, first_name, last_name, organization, checked_in_at = row
+            entry = self.entries[user_id] = BadgeEntry(f"{first_name} {last_name}", organization, checked_in_at)
+            self.checked_in += checked_in_at is not None
+        return entry
+
+    def check_in(self, entry: BadgeEntry, checked_in_at: datetime) -> bool:
+        """Mark the participant as arrived at the earliest time seen; False if they already were"""
+        if entry.checked_in_at is not None:
+            # An offline scan synced late can predate the check-in on record
+            entry.checked_in_at = min(entry.checked_in_at, checked_in_at)
+            return False
+        entry.checked_in_at = checked_in_at
+        self.checked_in += 1
+        return True
+
+
+class CheckInRecorder:
+    """Buffers check-ins and writes them in batches from one background task.
+
+    A scan is answered as soon as it is buffered. The buffer is written
+    every ``flush_interval`` seconds, or once it holds ``batch_size``
+    check-ins, with one INSERT per batch. A batch that fails to write is
+    kept and retried on the next flush; after ``max_retries`` failures its
+    check-ins are written one by one and the ones that still fail are
+    logged and dropped, so a bad row cannot hold back the rest.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_retries: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.pending: List[Dict[str, Any]] = []
+        self.failures = 0
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = False
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self.task and not self.task.done():
+            return
+        if self.task:
+            logger.error("Check-in recorder task had stopped; restarting it")
+        self.stopping = False
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and write what is still buffered"""
+        if self.task:
+            # Not cancelled: a batch being written must not be dropped half way
+            self.stopping = True
+            self.wakeup.set()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+        if self.pending:
+            logger.error(f"Check-in recorder stopped with {len(self.pending)} unwritten check-ins")
+
+    def record(self, user_id: int, checked_in_at: datetime, device: Optional[str]) -> None:
+        self.start()
+        self.pending.append({"user_id": user_id, "checked_in_at": checked_in_at, "device": device})
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def _run(self) -> None:
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # The batch is back in the buffer; keep the task alive to retry it
+                logger.exception(f"Check-in flush failed: {e}")
+
+    async def flush(self) -> None:
+        while self.pending:
+            batch = self.pending[:self.batch_size]
+            del self.pending[:self.batch_size]
+            if self.failures >= self.max_retries:
+                await self._write_one_by_one(batch)
+                self.failures = 0
+                continue
+            try:
+                async with AsyncSessionLocal() as db:
+                    await insert_check_ins(db, batch)
+            except SQLAlchemyError as e:
+                self.failures += 1
+                logger.error(
+                    f"Writing {len(batch)} check-ins failed "
+                    f"({self.failures}/{self.max_retries}), retrying on the next flush: {e}"
+                )
+                self.pending[:0] = batch
+                return
+            except BaseException:
+                self.pending[:0] = batch
+                raise
+            self.failures = 0
+            self.written += len(batch)
+
+    async def _write_one_by_one(self, batch: List[Dict[str, Any]]) -> None:
+        for index, row in enumerate(batch):
+            try:
+                async with AsyncSessionLocal() as db:
+                    await insert_check_ins(db, [row])
+            except SQLAlchemyError as e:
+                logger.error(f"Dropping check-in {row} after {self.max_retries} failed batch writes: {e}")
+                self.dropped += 1
+                continue
+            except BaseException:
+                self.pending[:0] = batch[index:]
+                raise
+            self.written += 1
+
+
+badge_index = BadgeIndex()
+checkin_recorder = CheckInRecorder(
+    batch_size=settings.CHECKIN_BATCH_SIZE,
+    flush_interval=settings.CHECKIN_FLUSH_INTERVAL,
+    max_retries=settings.CHECKIN_MAX_RETRIES,
+)
+
+
+async def check_in_badge(
+    db: AsyncSession, token: str, scanned_at: datetime, device: Optional[str]
+) -> Tuple[int, BadgeEntry, bool]:
+    """Validate a scanned badge and check its holder in.
+
+    Returns (user id, entry, whether this was their first check-in);
+    raises 400 for a token that was not issued by this server and 404 for
+    a participant that no longer exists.
+    """
+    user_id = read_badge_token(token)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid badge")
+
+    entry = await badge_index.get(db, user_id)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Participant not found")
+
+    previous = entry.checked_in_at
+    first = badge_index.check_in(entry, scanned_at)
+    if entry.checked_in_at != previous:
+        checkin_recorder.record(user_id, scanned_at, device)
+    return user_id, entry, first
@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import csv
+import io
+import json
+import logging
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.security import get_password_hash
+from app.core.validation import validate_password, validate_gender, validate_birth_date
+from app.crud.user import get_existing_emails, insert_users
+from app.schemas.user import UserCreate, ImportReport, ImportRowError
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = [
+    "first_name", "last_name", "gender", "nationality", "organization",
+    "position", "birth_date", "email", "password", "password_confirm",
+]
+
+
+def parse_import_file(content: bytes, file_format: str) -> List[Dict[str, Any]]:
+    """Parse an uploaded CSV (with a header row) or JSON array into row dicts"""
+    text = content.decode("utf-8-sig")
+    if file_format == "json":
+        rows = json.loads(text)
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON import must be an array of objects")
+        return rows
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _validate_row(row: Dict[str, Any]) -> Tuple[Optional[UserCreate], Dict[str, str]]:
+    data = {field: (str(row[field]).strip() if row.get(field) is not None else None) for field in IMPORT_FIELDS}
+    if not data["password_confirm"]:
+        data["password_confirm"] = data["password"]
+
+    errors = {}
+    for field in IMPORT_FIELDS[:-1]:
+        if not data[field]:
+            errors[field] = "Field is required"
+    if errors:
+        return None, errors
+
+    errors.update(validate_password(data["password"], data["password_confirm"]))
+    errors.update(validate_gender(data["gender"]))
+    errors.update(validate_birth_date(data["birth_date"]))
+    if errors:
+        return None, errors
+
+    try:
+        return UserCreate(**data), {}
+    except ValidationError as e:
+        return None, {
+            ".".join(str(part) for part in error["loc"]) or "row": error["msg"]
+            for error in e.errors()
+        }
+
+
+async def _hash_passwords(executor: ThreadPoolExecutor, passwords: List[str]) -> List[str]:
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(executor, get_password_hash, password) for password in passwords)
+    )
+
+
+def _user_values(user_data: UserCreate, hashed_password: str) -> Dict[str, Any]:
+    values = user_data.model_dump(exclude={"password", "password_confirm"})
+    values["hashed_password"] = hashed_password
+    return values
+
+
+async def import_users(db: AsyncSession, rows: List[Dict[str, Any]]) -> ImportReport:
+    """Validate, deduplicate and insert participants in batches.
+
+    Row numbers in the report are 1-based positions in the input. Passwords
+    are hashed on a dedicated pool so an import does not starve logins of
+    the shared hashing pool.
+    """
+    errors: List[ImportRowError] = []
+    valid: List[Tuple[int, UserCreate]] = []
+    seen_emails = set()
+
+    for number, row in enumerate(rows, start=1):
+        user_data, row_errors = _validate_row(row)
+        if row_errors:
+            email = row.get("email")
+            errors.append(ImportRowError(
+                row=number, email=str(email) if email is not None else None, errors=row_errors
+            ))
+        elif user_data.email in seen_emails:
+            errors.append(ImportRowError(
+                row=number, email=user_data.email, errors={"email": "Duplicate email in import"}
+            ))
+        else:
+            seen_emails.add(user_data.email)
+            valid.append((number, user_data))
+
+    existing = await get_existing_emails(db, seen_emails)
+    pending = []
+    for number, user_data in valid:
+        if user_data.email in existing:
+            errors.append(ImportRowError(
+                row=number, email=user_data.email, errors={"email": "Email already registered"}
+            ))
+        else:
+            pending.append((number, user_data))
+
+    created = 0
+    batch_size = settings.IMPORT_BATCH_SIZE
+    with ThreadPoolExecutor(max_workers=settings.IMPORT_HASH_WORKERS) as executor:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            hashes = await _hash_passwords(executor, [user_data.password for _, user_data in batch])
+            values = [_user_values(user_data, hashed) for (_, user_data), hashed in zip(batch, hashes)]
+
+            try:
+                await insert_users(db, values)
+                created += len(values)
+            except IntegrityError:
+                await db.rollback()
+                # A concurrent registration took one of the emails: retry row by row
+                for (number, user_data), row_values in zip(batch, values):
+                    try:
+                        await insert_users(db, [row_values])
+                        created += 1
+                    except IntegrityError:
+                        await db.rollback()
+                        errors.append(ImportRowError(
+                            row=number, email=user_data.email, errors={"email": "Email already registered"}
+                        ))
+
+            logger.info(f"Bulk import progress: {created} of {len(pending)} users created")
+
+    errors.sort(key=lambda error: error.row)
+    return ImportReport(total=len(rows), created=created, failed=len(errors), errors=errors)
@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Tuple
+import enum
+import json
+import logging
+import time
+
+from app.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get_nowait(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    def set_nowait(self, key: str, value: Any) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.get_nowait(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self.set_nowait(key, value)
+
+    async def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class RedisCacheBackend:
+    """Cache shared by all workers, stored as JSON in Redis"""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "conference:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a shared cache backend")
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+# Never copied into the cache, which may be shared (Redis); the login and
+# password paths read users from the database instead
+UNCACHED_COLUMNS = {"hashed_password"}
+CACHED_COLUMNS = [column for column in User.__table__.columns if column.name not in UNCACHED_COLUMNS]
+
+
+def _dump_user(user: User) -> Dict[str, Any]:
+    data = {}
+    for column in CACHED_COLUMNS:
+        value = getattr(user, column.name)
+        if isinstance(value, enum.Enum):
+            value = value.value
+        elif isinstance(value, date):
+            value = value.isoformat()
+        data[column.name] = value
+    return data
+
+
+def _load_user(data: Dict[str, Any]) -> User:
+    values = {}
+    for column in CACHED_COLUMNS:
+        value = data.get(column.name)
+        if value is not None:
+            python_type = column.type.python_type
+            if issubclass(python_type, enum.Enum):
+                value = python_type(value)
+            elif issubclass(python_type, date):
+                value = python_type.fromisoformat(value)
+        values[column.name] = value
+    return User(**values)
+
+
+class UserCache:
+    """Cache of resolved users keyed by user id.
+
+    Entries are stored as plain column snapshots and rebuilt into a fresh,
+    session-less User on every hit, so requests never share ORM instances.
+    Cached users have no ``hashed_password``.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[User]:
+        try:
+            data = await self.backend.get(self._key(user_id))
+        except Exception as e:
+            logger.error(f"User cache read failed: {str(e)}")
+            data = None
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return _load_user(data)
+
+    async def set(self, user: User) -> None:
+        try:
+            await self.backend.set(self._key(user.id), _dump_user(user))
+        except Exception as e:
+            logger.error(f"User cache write failed: {str(e)}")
+
+    async def invalidate(self, user_id: int) -> None:
+        try:
+            await self.backend.delete(self._key(user_id))
+        except Exception as e:
+            logger.error(f"User cache invalidation failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if isinstance(self.backend, LocalCacheBackend):
+            stats["size"] = len(self.backend)
+        return stats
+
+
+def create_user_cache() -> UserCache:
+    if settings.USER_CACHE_URL:
+        backend = RedisCacheBackend(settings.USER_CACHE_URL, ttl=settings.USER_CACHE_TTL)
+    else:
+        backend = LocalCacheBackend(
+            max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL
+        )
+    return UserCache(backend)
+
+
+user_cache = create_user_cache()
+
+
+class FragmentCache:
+    """Rendered template fragments grouped into invalidatable namespaces.
+
+    Invalidation is per process; in multi-worker deployments include a
+    shared version (such as the users change version) in the key so other
+    workers miss instead of serving stale fragments until FRAGMENT_CACHE_TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.store = LocalCacheBackend(max_size=max_size, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(namespace: str, parts: Tuple[Any, ...]) -> str:
+        return "|".join([namespace] + [str(part) for part in parts])
+
+    def get_or_render(self, namespace: str, parts: Tuple[Any, ...], render: Callable[[], str]) -> str:
+        key = self._key(namespace, parts)
+        value = self.store.get_nowait(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = render()
+        self.store.set_nowait(key, value)
+        return value
+
+    def invalidate(self, namespace: str) -> None:
+        prefix = namespace + "|"
+        for key in [key for key in self.store.entries if key == namespace or key.startswith(prefix)]:
+            del self.store.entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.store)}
+
+
+fragment_cache = FragmentCache(
+    max_size=settings.FRAGMENT_CACHE_MAX_SIZE, ttl=settings.FRAGMENT_CACHE_TTL
+)
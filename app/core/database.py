@@ -1,21 +1,226 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+import asyncio
+import weakref
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.core.metrics import instrument_engine
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    if "+" in url.drivername:
+        return database_url
+    driver = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def is_memory_sqlite(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def get_pool_options(database_url: str, pool_size: int = None) -> dict:
+    if is_memory_sqlite(database_url):
+        return {}
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": pool_size or settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def get_sqlite_pragmas(read_only: bool = False) -> List[str]:
+    pragmas = []
+    if settings.SQLITE_PROFILE == "production":
+        pragmas = [
+            f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+            f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+            f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+            # A negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+            f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        ]
+    if read_only:
+        # Turns any accidental write on a read session into an error
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def configure_sqlite(engine, read_only: bool = False) -> None:
+    """Apply the SQLite pragmas to every new connection of a (sync) engine"""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = get_sqlite_pragmas(read_only)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    connect_args=connect_args,
+    **get_pool_options(settings.DATABASE_URL),
+)
+
+configure_sqlite(engine)
+configure_sqlite(async_engine.sync_engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Reads get their own pool so they never wait behind (or hold) the write
+# lock; an in-memory database only exists on its one connection, so there
+# they share the write engine
+read_database_url = settings.DATABASE_READ_URL or settings.DATABASE_URL
+if is_memory_sqlite(read_database_url):
+    read_engine = async_engine
+else:
+    read_connect_args = {"check_same_thread": False} if read_database_url.startswith("sqlite") else {}
+    read_engine = create_async_engine(
+        get_async_database_url(read_database_url),
+        connect_args=read_connect_args,
+        **get_pool_options(read_database_url, settings.DB_READ_POOL_SIZE),
+    )
+    configure_sqlite(read_engine.sync_engine, read_only=True)
+    instrument_engine(read_engine.sync_engine)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+def init_db():
+    """Create missing tables, then any nullable columns and indexes added to existing tables"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(
+                        f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                    )
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+# One asyncio.Lock per event loop; see sqlite_write_lock
+_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def sqlite_write_lock() -> AsyncIterator[None]:
+    """Serialize this worker's write transactions when the database is SQLite.
+
+    SQLite runs one write transaction at a time anyway; queueing the
+    worker's writers on an asyncio lock (FIFO) keeps them from all spinning
+    in SQLite's busy handler, which under contention makes lock holders
+    wait and stragglers hit busy_timeout. Other databases use row locks,
+    so there it does nothing.
+    """
+    if async_engine.dialect.name != "sqlite":
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    async with lock:
+        yield
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Session on the write engine; use it for handlers that modify data"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Read-only session for GET handlers"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    return status
+
+
+async def check_database(timeout: float = 2.0) -> dict:
+    """Ping the write and read engines; used by the readiness endpoint"""
+    engines = {"write": async_engine}
+    if read_engine is not async_engine:
+        engines["read"] = read_engine
+
+    results = {}
+    for name, db_engine in engines.items():
+        result = {"ok": True}
+        try:
+            await asyncio.wait_for(_ping(db_engine), timeout)
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        result.update(pool_status(db_engine))
+        results[name] = result
+    return results
+
+
+async def _ping(db_engine) -> None:
+    async with db_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if read_engine is not async_engine:
+        await read_engine.dispose()
@@ -1,93 +1,287 @@
+import asyncio
+import logging
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import random
-import string
-from typing import Dict
+from typing import Dict, List, Optional, Set
 
 from app.config import settings
-from app.core.logging import logger
+from app.core.metrics import smtp_send_duration
+from app.core.reset_codes import reset_code_store
 
-# Dictionary to store reset codes with email as key
-reset_codes: Dict[str, str] = {}
+logger = logging.getLogger(__name__)
 
-def generate_reset_code(email: str) -> str:
+async def generate_reset_code(email: str) -> str:
     """Generate a 6-digit reset code and store it for the email"""
-    code = ''.join(random.choices(string.digits, k=6))
-    reset_codes[email] = code
-    return code
-
-def verify_reset_code(email: str, code: str) -> bool:
-    """Verify if the reset code for the email is correct"""
-    stored_code = reset_codes.get(email)
-    if not stored_code:
-        return False
-    
-    # One-time use: remove the code after verification
-    if stored_code == code:
-        del reset_codes[email]
-        return True
-    
-    return False
+    return await reset_code_store.issue(email)
 
-def send_email(to_email: str, subject: str, html_content: str) -> bool:
-    """Send an email with the given subject and HTML content"""
-    if not settings.EMAIL_USERNAME or not settings.EMAIL_PASSWORD:
-        logger.error("Email credentials not configured")
-        return False
-    
-    try:
-        message = MIMEMultipart()
-        message["From"] = settings.EMAIL_FROM
-        message["To"] = to_email
-        message["Subject"] = subject
-        
-        message.attach(MIMEText(html_content, "html"))
-        
-        with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
+async def verify_reset_code(email: str, code: str) -> bool:
+    """Verify if the reset code for the email is correct (one-time use)"""
+    return await reset_code_store.verify(email, code)
+
+
+class PermanentEmailError(Exception):
+    """Delivery failure that retrying will not fix"""
+
+
+@dataclass
+class OutboundEmail:
+    to_email: str
+    subject: str
+    html_content: str
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open between messages.
+
+    Used from the mail worker threads only; a connection is checked out by
+    one thread at a time and dropped as soon as it fails.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.idle: List[smtplib.SMTP] = []
+        self.lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=settings.EMAIL_TIMEOUT)
+        try:
             if settings.EMAIL_USE_TLS:
                 server.starttls()
-            
-            try:
+            if settings.EMAIL_USE_AUTH:
                 server.login(settings.EMAIL_USERNAME, settings.EMAIL_PASSWORD)
-            except smtplib.SMTPAuthenticationError as auth_err:
-                logger.error(f"SMTP Authentication failed: {str(auth_err)}")
-                return False
-            except Exception as login_err:
-                logger.error(f"SMTP Login error: {str(login_err)}")
-                return False
-                
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            with self.lock:
+                server = self.idle.pop() if self.idle else None
+            if server is None:
+                return self._connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            self._close(server)
+
+    def release(self, server: smtplib.SMTP) -> None:
+        with self.lock:
+            if len(self.idle) < self.max_size:
+                self.idle.append(server)
+                return
+        self._close(server)
+
+    def discard(self, server: smtplib.SMTP) -> None:
+        self._close(server)
+
+    def close_all(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for server in idle:
+            self._close(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
             try:
-                server.send_message(message)
-            except smtplib.SMTPRecipientsRefused:
-                logger.error(f"Email recipient refused: {to_email}")
-                return False
-            except smtplib.SMTPSenderRefused:
-                logger.error(f"Email sender refused: {settings.EMAIL_FROM}")
-                return False
-            except Exception as send_err:
-                logger.error(f"Failed to send email: {str(send_err)}")
-                return False
-        
-        logger.info(f"Email sent successfully to {to_email}")
+                server.close()
+            except Exception:
+                pass
+
+
+class MailQueue:
+    """Outbound mail queue drained by a fixed number of background workers.
+
+    Handlers enqueue and return immediately; each worker delivers one
+    message at a time on its own thread using pooled SMTP connections, and
+    transient failures are retried with exponential backoff.
+    """
+
+    def __init__(self, workers: int, max_size: int, max_retries: int, retry_backoff: float):
+        self.worker_count = workers
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.pool = SMTPConnectionPool(max_size=workers)
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.workers: List[asyncio.Task] = []
+        self.retry_tasks: Set[asyncio.Task] = set()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+
+    def is_configured(self) -> bool:
+        if not settings.EMAIL_HOST:
+            return False
+        if settings.EMAIL_USE_AUTH and not (settings.EMAIL_USERNAME and settings.EMAIL_PASSWORD):
+            return False
         return True
-    
-    except smtplib.SMTPConnectError:
-        logger.error(f"Failed to connect to SMTP server: {settings.EMAIL_HOST}:{settings.EMAIL_PORT}")
-        return False
-    except smtplib.SMTPServerDisconnected:
-        logger.error("Server disconnected unexpectedly")
-        return False
-    except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {str(e)}")
-        return False
 
-def send_password_reset_email(email: str) -> bool:
+    def start(self) -> None:
+        if self.workers:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_size)
+        self.executor = ThreadPoolExecutor(max_workers=self.worker_count, thread_name_prefix="mail")
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.worker_count)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Deliver what is already queued (up to timeout), then stop the workers"""
+        if not self.workers:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                await asyncio.wait_for(self.queue.join(), timeout=max(deadline - time.monotonic(), 0))
+                if not self.retry_tasks:
+                    break
+                await asyncio.wait(self.retry_tasks, timeout=max(deadline - time.monotonic(), 0))
+                if time.monotonic() >= deadline:
+                    raise asyncio.TimeoutError
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Mail queue stopped with {self.queue.qsize() + len(self.retry_tasks)} undelivered messages"
+            )
+        for task in self.workers + list(self.retry_tasks):
+            task.cancel()
+        await asyncio.gather(*self.workers, *self.retry_tasks, return_exceptions=True)
+        self.workers = []
+        self.retry_tasks.clear()
+        self.executor.shutdown(wait=True)
+        self.pool.close_all()
+
+    def enqueue(self, to_email: str, subject: str, html_content: str) -> bool:
+        if not self.is_configured():
+            logger.error("Email credentials not configured")
+            return False
+
+        self.start()
+        try:
+            self.queue.put_nowait(OutboundEmail(to_email, subject, html_content))
+        except asyncio.QueueFull:
+            logger.error(f"Mail queue full, dropping email to {to_email}")
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await self.queue.get()
+            started = time.perf_counter()
+            outcome = "sent"
+            try:
+                message.attempts += 1
+                await loop.run_in_executor(self.executor, self._deliver, message)
+                latency = time.monotonic() - message.enqueued_at
+                self.sent += 1
+                self.last_latency = latency
+                self.total_latency += latency
+                logger.info(f"Email sent successfully to {message.to_email}")
+            except PermanentEmailError as e:
+                outcome = "failed"
+                self.failed += 1
+                logger.error(f"Failed to send email to {message.to_email}: {str(e)}")
+            except Exception as e:
+                outcome = "error"
+                if message.attempts > self.max_retries:
+                    self.failed += 1
+                    logger.error(
+                        f"Giving up on email to {message.to_email} after {message.attempts} attempts: {str(e)}"
+                    )
+                else:
+                    self._schedule_retry(message, e)
+            finally:
+                smtp_send_duration.observe(time.perf_counter() - started, outcome)
+                self.queue.task_done()
+
+    def _schedule_retry(self, message: OutboundEmail, error: Exception) -> None:
+        delay = self.retry_backoff * 2 ** (message.attempts - 1)
+        self.retried += 1
+        logger.warning(f"Email to {message.to_email} failed ({str(error)}), retrying in {delay:.1f}s")
+
+        async def requeue():
+            await asyncio.sleep(delay)
+            await self.queue.put(message)
+
+        task = asyncio.create_task(requeue())
+        self.retry_tasks.add(task)
+        task.add_done_callback(self.retry_tasks.discard)
+
+    def _deliver(self, message: OutboundEmail) -> None:
+        mime = MIMEMultipart()
+        mime["From"] = settings.EMAIL_FROM
+        mime["To"] = message.to_email
+        mime["Subject"] = message.subject
+        mime.attach(MIMEText(message.html_content, "html"))
+
+        try:
+            server = self.pool.acquire()
+        except smtplib.SMTPAuthenticationError as auth_err:
+            raise PermanentEmailError(f"SMTP Authentication failed: {str(auth_err)}")
+
+        try:
+            server.send_message(mime)
+        except smtplib.SMTPRecipientsRefused:
+            self.pool.release(server)
+            raise PermanentEmailError(f"Email recipient refused: {message.to_email}")
+        except smtplib.SMTPSenderRefused:
+            self.pool.release(server)
+            raise PermanentEmailError(f"Email sender refused: {settings.EMAIL_FROM}")
+        except Exception:
+            self.pool.discard(server)
+            raise
+
+        self.pool.release(server)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "pending_retries": len(self.retry_tasks),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "last_latency_seconds": self.last_latency,
+            "avg_latency_seconds": self.total_latency / self.sent if self.sent else 0.0,
+        }
+
+
+mail_queue = MailQueue(
+    workers=settings.EMAIL_WORKERS,
+    max_size=settings.EMAIL_QUEUE_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+)
+
+def send_email(to_email: str, subject: str, html_content: str) -> bool:
+    """Queue an email with the given subject and HTML content for delivery"""
+    return mail_queue.enqueue(to_email, subject, html_content)
+
+async def send_password_reset_email(email: str) -> bool:
     """Send a password reset email with a verification code"""
-    reset_code = generate_reset_code(email)
-    
+    if not mail_queue.is_configured():
+        logger.error("Email credentials not configured")
+        return False
+
+    reset_code = await generate_reset_code(email)
+
     subject = f"{settings.APP_NAME} - Password Reset"
-    
+
     html_content = f"""
     <html>
         <body>
@@ -100,5 +294,5 @@ def send_password_reset_email(email: str) -> bool:
         </body>
     </html>
     """
-    
-    return send_email(email, subject, html_content) 
\ No newline at end of file
+
+    return send_email(email, subject, html_content)
@@ -1,42 +1,166 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+from contextvars import ContextVar
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
 
 from app.config import settings
 
+# Fields of the current request (path, method, user_id) added to every record
+request_context: "ContextVar[Optional[Dict[str, Any]]]" = ContextVar("request_context", default=None)
+
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample", "color_message"}
+
+
+def bind_log_context(**fields: Any) -> None:
+    """Attach fields to the remaining log records of the current request"""
+    context = request_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields become top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(_record_fields(record))
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic format with ``extra`` fields appended as key=value"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class ContextFilter(logging.Filter):
+    """Drops sampled records and adds the request context to the rest.
+
+    Runs on the calling thread, so it must stay cheap: records tagged with
+    ``extra={"sample": key}`` are kept with the probability configured for
+    ``key`` in LOG_SAMPLE_RATES.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample = getattr(record, "sample", None)
+        if sample is not None:
+            rate = self.sample_rates.get(sample, 1.0)
+            if rate < 1.0:
+                if random.random() >= rate:
+                    return False
+                record.sample_rate = rate
+
+        context = request_context.get()
+        if context:
+            for key, value in context.items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread without formatting them.
+
+    The queue is in-process, so records don't need to be made picklable;
+    formatting and I/O happen on the listener thread. When the queue is
+    full, records are dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    mapping = {}
+    for item in value.split(","):
+        key, _, setting = item.partition("=")
+        if key.strip() and setting.strip():
+            mapping[key.strip()] = setting.strip()
+    return mapping
+
+
 def setup_logging():
-    log_level = logging.INFO
+    log_level = logging.getLevelName(settings.LOG_LEVEL.upper())
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter(log_format)
+
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-    
+
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    console_formatter = logging.Formatter(log_format)
-    console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(formatter)
+
     file_handler = RotatingFileHandler(
         log_dir / "app.log",
         maxBytes=10485760,
         backupCount=5
     )
     file_handler.setLevel(log_level)
-    file_formatter = logging.Formatter(log_format)
-    file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
-    
-    logging.getLogger("uvicorn").setLevel(log_level)
-    logging.getLogger("uvicorn.access").setLevel(log_level)
-    
+    file_handler.setFormatter(formatter)
+
+    # Only the queue handler runs on the caller's thread; formatting,
+    # writes and rotation happen on the listener thread
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    sample_rates = {key: float(rate) for key, rate in _parse_mapping(settings.LOG_SAMPLE_RATES).items()}
+    queue_handler.addFilter(ContextFilter(sample_rates))
+    listener = QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(queue_handler)
+
+    # Route uvicorn's own handlers through the queue as well
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+        uvicorn_logger.setLevel(log_level)
+
     app_logger = logging.getLogger("app")
     app_logger.setLevel(log_level)
-    
+
+    for name, level in _parse_mapping(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level.upper())
+
     return app_logger
 
-logger = setup_logging()
\ No newline at end of file
+logger = setup_logging()
@@ -0,0 +1,370 @@
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """Base for metrics whose samples are sharded per thread.
+
+    Each thread updates its own shard without taking a lock; the lock is
+    only taken when a thread records its first sample and when the shards
+    are merged for a scrape.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, list]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[LabelValues, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _new_sample(self) -> list:
+        raise NotImplementedError
+
+    def collect(self) -> Dict[LabelValues, list]:
+        merged: Dict[LabelValues, list] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labels, sample in list(shard.items()):
+                total = merged.setdefault(labels, self._new_sample())
+                for i, value in enumerate(sample):
+                    total[i] += value
+        return merged
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_sample(self) -> list:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        sample = shard.get(labels)
+        if sample is None:
+            sample = shard[labels] = [0.0]
+        sample[0] += amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_sample(self) -> list:
+        # Per-bucket (non-cumulative) counts, the +Inf bucket, then the sum
+        return [0.0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        sample = shard.get(labels)
+        if sample is None:
+            sample = shard[labels] = self._new_sample()
+        sample[bisect_left(self.buckets, value)] += 1
+        sample[-1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.gauges: List[Tuple[str, str, Callable[[], float]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> None:
+        """Register a gauge whose value is read from ``callback`` at scrape time"""
+        self.gauges.append((name, documentation, callback))
+
+    def snapshot(self) -> dict:
+        """Plain-data state of this process, as written to METRICS_DIR"""
+        samples = {
+            metric.name: [[list(labels), sample] for labels, sample in metric.collect().items()]
+            for metric in self.metrics
+        }
+        gauges = {}
+        for name, _, callback in self.gauges:
+            try:
+                gauges[name] = float(callback())
+            except Exception as e:
+                logger.error(f"Metrics gauge {name} failed: {str(e)}")
+        return {"samples": samples, "gauges": gauges}
+
+    def render(self, snapshots: Iterable[dict]) -> str:
+        """Prometheus text exposition of the sum of the given snapshots"""
+        snapshots = list(snapshots)
+        lines = []
+        for metric in self.metrics:
+            merged: Dict[LabelValues, list] = {}
+            for snapshot in snapshots:
+                for labels, sample in snapshot["samples"].get(metric.name, []):
+                    total = merged.setdefault(tuple(labels), [0.0] * len(sample))
+                    for i, value in enumerate(sample):
+                        total[i] += value
+
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, sample in sorted(merged.items()):
+                pairs = [f'{name}="{_escape(value)}"' for name, value in zip(metric.labelnames, labels)]
+                if metric.kind == "counter":
+                    lines.append(f"{metric.name}{_labels(pairs)} {_number(sample[0])}")
+                    continue
+
+                cumulative = 0.0
+                for bound, count in zip(metric.buckets + (float("inf"),), sample):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    bucket_pairs = pairs + ['le="%s"' % le]
+                    lines.append(f"{metric.name}_bucket{_labels(bucket_pairs)} {_number(cumulative)}")
+                lines.append(f"{metric.name}_sum{_labels(pairs)} {_number(sample[-1])}")
+                lines.append(f"{metric.name}_count{_labels(pairs)} {_number(cumulative)}")
+
+        for name, documentation, _ in self.gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            value = sum(snapshot["gauges"].get(name, 0.0) for snapshot in snapshots)
+            lines.append(f"{name} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Time spent executing SQL statements", buckets=FAST_BUCKETS
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time on the hashing pool",
+    ("operation",), buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+smtp_send_duration = registry.histogram(
+    "smtp_send_duration_seconds", "SMTP delivery time per message attempt", ("outcome",)
+)
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total", "Login attempts rejected by the rate limiter", ("limit",)
+)
+admission_rejections = registry.counter(
+    "admission_rejections_total", "Gated requests turned away by admission control", ("reason",)
+)
+admission_wait_duration = registry.histogram(
+    "admission_wait_duration_seconds", "Time gated requests waited for an admission slot"
+)
+template_render_duration = registry.histogram(
+    "template_render_duration_seconds", "Jinja2 template render time", ("template",), buckets=FAST_BUCKETS
+)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement executed through a (sync) SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        db_query_duration.observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Mounted app such as /static
+        return scope.get("root_path", "") + "/{path}"
+    # Keep unmatched paths out of the labels so scanners can't blow up cardinality
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Records request count and latency per route template (plain ASGI)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_label(scope)
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status_code))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, but owned by another user
+        pass
+    return True
+
+
+class MultiprocessExporter:
+    """Shares metrics between workers through snapshot files.
+
+    Every worker writes its snapshot to ``<directory>/<pid>.json`` on an
+    interval. A scrape of any worker first rewrites its own file, then sums
+    the files only: each file only ever moves forward, so counters never go
+    backwards between scrapes answered by different workers. Files of
+    processes that are gone are removed, so crashed or restarted workers
+    stop being counted.
+    """
+
+    def __init__(self, directory: Optional[str], interval: int):
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{os.getpid()}.json"
+
+    def write(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(registry.snapshot()))
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        if self.directory is not None:
+            self.path.unlink(missing_ok=True)
+
+    def snapshots(self) -> List[dict]:
+        if self.directory is None:
+            return [registry.snapshot()]
+
+        try:
+            self.write()
+        except OSError as e:
+            logger.error(f"Failed to write metrics snapshot: {str(e)}")
+
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if not path.stem.isdigit():
+                continue
+            if not _pid_alive(int(path.stem)):
+                logger.info(f"Removing metrics snapshot of a stopped process: {path}")
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {str(e)}")
+        return snapshots
+
+    def render(self) -> str:
+        return registry.render(self.snapshots())
+
+    async def run(self) -> None:
+        """Write this worker's snapshot periodically; runs for the app's lifetime"""
+        if self.directory is None:
+            return
+        while True:
+            try:
+                self.write()
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+
+exporter = MultiprocessExporter(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
@@ -0,0 +1,211 @@
+from typing import Iterable, List, Tuple
+import gzip
+import logging
+import time
+import zlib
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import request_context
+from app.core.metrics import route_label
+
+access_logger = logging.getLogger("app.access")
+
+SECURITY_HEADERS = {
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' https://cdn.jsdelivr.net; "
+        "style-src 'self' https://cdn.jsdelivr.net; "
+        "img-src 'self' data:; "
+        "font-src 'self' https://cdn.jsdelivr.net; "
+        "connect-src 'self'; "
+        "frame-ancestors 'none'; "
+        "form-action 'self';"
+    ),
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+}
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> bytes:
+    for key, value in headers:
+        if key == name:
+            return value
+    return b""
+
+
+class SecurityHeadersMiddleware:
+    """Adds the security headers to every HTTP response.
+
+    Plain ASGI: the header block is encoded once and appended to the
+    response start message, without wrapping the response body.
+    """
+
+    def __init__(self, app: ASGIApp, headers: dict = SECURITY_HEADERS):
+        self.app = app
+        self.raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()
+        ]
+        self.names = {name for name, _ in self.raw_headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [header for header in message.get("headers", []) if header[0] not in self.names]
+                headers.extend(self.raw_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class GZipMiddleware:
+    """Gzips HTML and JSON responses of at least ``minimum_size`` bytes.
+
+    Other media types (static files are already precompressed, exports are
+    streamed) and responses that already carry a Content-Encoding pass
+    through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 6,
+        media_types: Iterable[str] = ("text/html", "application/json"),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.media_types = tuple(media_type.encode() for media_type in media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or b"gzip" not in _header(
+            scope.get("headers", []), b"accept-encoding"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        responder = _GZipResponder(send, self.minimum_size, self.compresslevel, self.media_types)
+        await self.app(scope, receive, responder.send)
+
+
+class _GZipResponder:
+    def __init__(self, send: Send, minimum_size: int, compresslevel: int, media_types: Tuple[bytes, ...]):
+        self.downstream = send
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.media_types = media_types
+        self.start_message: Message = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _is_compressible(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if _header(headers, b"content-encoding"):
+            return False
+        content_type = _header(headers, b"content-type").split(b";", 1)[0].strip()
+        return content_type in self.media_types
+
+    def _encoded_headers(self, content_length: int = None) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (key, value) for key, value in self.start_message.get("headers", [])
+            if key != b"content-length"
+        ]
+        headers.append((b"content-encoding", b"gzip"))
+        vary = _header(headers, b"vary")
+        if vary:
+            headers = [(key, value) for key, value in headers if key != b"vary"]
+            headers.append((b"vary", vary + b", Accept-Encoding"))
+        else:
+            headers.append((b"vary", b"Accept-Encoding"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return headers
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if self._is_compressible(message.get("headers", [])):
+                self.start_message = message
+            else:
+                self.passthrough = True
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message: compress it only if it is worth it
+                if len(body) < self.minimum_size:
+                    await self.downstream(self.start_message)
+                    await self.downstream(message)
+                    return
+                compressed = gzip.compress(body, compresslevel=self.compresslevel)
+                self.start_message["headers"] = self._encoded_headers(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming response: compress chunk by chunk
+            self.compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            self.start_message["headers"] = self._encoded_headers()
+            await self.downstream(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if more_body:
+            chunk += self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            chunk += self.compressor.flush()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class RequestLoggingMiddleware:
+    """Binds method and path to the request's log records and writes one
+    access record with status and latency (sampling key "access").
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = {"method": scope["method"], "path": scope["path"]}
+        token = request_context.set(context)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_context.reset(token)
+            access_logger.info("Request completed", extra={
+                **context,
+                "route": route_label(scope),
+                "status": status_code,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                "sample": "access",
+            })
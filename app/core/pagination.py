@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+DIRECTION_NEXT = "next"
+DIRECTION_PREV = "prev"
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def encode_cursor(key: Tuple[Any, ...], direction: str) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor"""
+    payload = json.dumps({"k": list(key), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Tuple[Any, ...], str]:
+    """Decode a cursor produced by encode_cursor into (key, direction)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = tuple(payload["k"])
+        direction = payload["d"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREV):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+    return key, direction
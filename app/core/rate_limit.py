@@ -1,32 +1,126 @@
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+import logging
+import sys
 import time
 from fastapi import HTTPException, Request, status
 
 from app.config import settings
-from app.core.logging import logger
+from app.core.metrics import rate_limit_rejections
+
+logger = logging.getLogger(__name__)
+
+
+class WindowCounter:
+    __slots__ = ("window_start", "current", "previous", "last_seen")
+
+    def __init__(self, window_start: float):
+        self.window_start = window_start
+        self.current = 0
+        self.previous = 0
+        self.last_seen = window_start
+
+
+class SlidingWindowRateLimiter:
+    """Approximate sliding-window counters with bounded memory.
+
+    Each key keeps only the hit counts of the current and previous fixed
+    windows; the sliding count is the current count plus the previous one
+    weighted by how much of it still overlaps the window. Keys are kept in
+    LRU order, idle keys expire after two windows and the total number of
+    keys is capped, so a flood of distinct clients cannot grow memory.
+    """
+
+    def __init__(self, window: int, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self.counters: "OrderedDict[str, WindowCounter]" = OrderedDict()
+        self.rejected = 0
+        self.evicted = 0
+
+    def _get_counter(self, key: str, now: float) -> WindowCounter:
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = WindowCounter(now - now % self.window)
+            self.counters[key] = counter
+        else:
+            self.counters.move_to_end(key)
+            elapsed_windows = int((now - counter.window_start) // self.window)
+            if elapsed_windows >= 1:
+                counter.previous = counter.current if elapsed_windows == 1 else 0
+                counter.current = 0
+                counter.window_start += elapsed_windows * self.window
+        counter.last_seen = now
+        return counter
+
+    def _estimate(self, counter: WindowCounter, now: float) -> float:
+        overlap = 1 - (now - counter.window_start) / self.window
+        return counter.current + counter.previous * overlap
+
+    def _evict(self, now: float) -> None:
+        expire_before = now - 2 * self.window
+        while self.counters:
+            key, counter = next(iter(self.counters.items()))
+            if counter.last_seen >= expire_before and len(self.counters) <= self.max_keys:
+                break
+            del self.counters[key]
+            self.evicted += 1
+
+    def hit(self, limits: Iterable[Tuple[str, int]]) -> Tuple[bool, str]:
+        """Record one hit against every key unless any of them is over its limit.
+
+        Returns (allowed, key) where key is the first limit that was exceeded.
+        """
+        now = time.monotonic()
+        counters = [(key, limit, self._get_counter(key, now)) for key, limit in limits]
+
+        for key, limit, counter in counters:
+            if self._estimate(counter, now) >= limit:
+                self.rejected += 1
+                self._evict(now)
+                return False, key
+
+        for _, _, counter in counters:
+            counter.current += 1
+        self._evict(now)
+        return True, ""
+
+    def stats(self) -> Dict[str, int]:
+        per_entry = sys.getsizeof(WindowCounter(0.0))
+        key_bytes = sum(sys.getsizeof(key) for key in self.counters)
+        return {
+            "tracked_keys": len(self.counters),
+            "max_keys": self.max_keys,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "approx_memory_bytes": sys.getsizeof(self.counters) + key_bytes + per_entry * len(self.counters),
+        }
+
+
+login_attempts = SlidingWindowRateLimiter(
+    window=settings.LOGIN_RATE_LIMIT_WINDOW,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+)
+
+
+def get_client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
 
-login_attempts: Dict[str, list] = {}
 
 def check_login_rate_limit(request: Request, email: str) -> None:
-    ip_address = request.client.host
-    current_time = time.time()
-    
-    if ip_address in login_attempts:
-        login_attempts[ip_address] = [
-            attempt for attempt in login_attempts[ip_address]
-            if current_time - attempt[0] < 60
-        ]
-    else:
-        login_attempts[ip_address] = []
-    
-    recent_attempts = login_attempts[ip_address]
-    if len(recent_attempts) >= settings.LOGIN_RATE_LIMIT:
+    ip_address = get_client_ip(request)
+    account = (email or "").strip().lower()
+
+    allowed, key = login_attempts.hit([
+        (f"ip:{ip_address}", settings.LOGIN_RATE_LIMIT),
+        (f"email:{account}", settings.LOGIN_RATE_LIMIT_PER_ACCOUNT),
+    ])
+    if not allowed:
+        rate_limit_rejections.inc(key.split(':', 1)[0])
         logger.warning(
-            f"Rate limit exceeded for IP: {ip_address}, Email: {email}"
+            f"Rate limit exceeded for {key.split(':', 1)[0]}, IP: {ip_address}, Email: {email}"
         )
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many login attempts. Please try again later."
         )
-    
-    login_attempts[ip_address].append((current_time, email)) 
\ No newline at end of file
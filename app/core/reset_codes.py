@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import logging
+import secrets
+import string
+
+from sqlalchemy import delete, update
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.reset_code import PasswordResetCode
+
+logger = logging.getLogger(__name__)
+
+
+def _generate_code() -> str:
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+
+def _hash_code(email: str, code: str) -> str:
+    return hashlib.sha256(f"{email}:{code}".encode()).hexdigest()
+
+
+class MemoryResetCodeStore:
+    """Reset codes kept in this process only; suitable for a single worker"""
+
+    def __init__(self, ttl: timedelta, max_attempts: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        # email -> [code hash, expiry, failed attempts]
+        self.codes: Dict[str, list] = {}
+
+    async def issue(self, email: str) -> str:
+        code = _generate_code()
+        self.codes[email] = [_hash_code(email, code), datetime.utcnow() + self.ttl, 0]
+        return code
+
+    async def verify(self, email: str, code: str) -> bool:
+        entry = self.codes.get(email)
+        if not entry:
+            return False
+
+        code_hash, expires_at, attempts = entry
+        if expires_at <= datetime.utcnow():
+            del self.codes[email]
+            return False
+
+        # One-time use: remove the code after verification
+        if secrets.compare_digest(code_hash, _hash_code(email, code)):
+            del self.codes[email]
+            return True
+
+        entry[2] = attempts + 1
+        if entry[2] >= self.max_attempts:
+            del self.codes[email]
+        return False
+
+    async def sweep(self) -> int:
+        now = datetime.utcnow()
+        expired = [email for email, entry in self.codes.items() if entry[1] <= now]
+        for email in expired:
+            del self.codes[email]
+        return len(expired)
+
+
+class DatabaseResetCodeStore:
+    """Reset codes stored in the database so every worker sees the same codes.
+
+    Verification is a single conditional DELETE, so a code can be redeemed
+    at most once even when two workers race on it.
+    """
+
+    def __init__(self, ttl: timedelta, max_attempts: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    async def issue(self, email: str) -> str:
+        code = _generate_code()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(PasswordResetCode).where(PasswordResetCode.email == email))
+            db.add(PasswordResetCode(
+                email=email,
+                code_hash=_hash_code(email, code),
+                expires_at=datetime.utcnow() + self.ttl,
+                attempts=0,
+            ))
+            await db.commit()
+        return code
+
+    async def verify(self, email: str, code: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(PasswordResetCode).where(
+                    PasswordResetCode.email == email,
+                    PasswordResetCode.code_hash == _hash_code(email, code),
+                    PasswordResetCode.expires_at > datetime.utcnow(),
+                )
+            )
+            if result.rowcount:
+                await db.commit()
+                return True
+
+            await db.execute(
+                update(PasswordResetCode)
+                .where(PasswordResetCode.email == email)
+                .values(attempts=PasswordResetCode.attempts + 1)
+            )
+            await db.execute(
+                delete(PasswordResetCode).where(
+                    PasswordResetCode.email == email,
+                    PasswordResetCode.attempts >= self.max_attempts,
+                )
+            )
+            await db.commit()
+            return False
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(PasswordResetCode).where(PasswordResetCode.expires_at <= datetime.utcnow())
+            )
+            await db.commit()
+            return result.rowcount
+
+
+def create_reset_code_store():
+    ttl = timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
+    if settings.RESET_CODE_BACKEND == "memory":
+        return MemoryResetCodeStore(ttl=ttl, max_attempts=settings.RESET_CODE_MAX_ATTEMPTS)
+    return DatabaseResetCodeStore(ttl=ttl, max_attempts=settings.RESET_CODE_MAX_ATTEMPTS)
+
+
+reset_code_store = create_reset_code_store()
+
+
+async def sweep_reset_codes(interval: Optional[int] = None) -> None:
+    """Periodically delete expired reset codes; runs for the app's lifetime"""
+    interval = interval or settings.RESET_CODE_SWEEP_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await reset_code_store.sweep()
+            if removed:
+                logger.info(f"Removed {removed} expired password reset codes")
+        except Exception as e:
+            logger.error(f"Failed to sweep password reset codes: {str(e)}")
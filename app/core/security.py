@@ -1,15 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Callable, Optional, Union
+import asyncio
 import secrets
 
 from jose import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_read_db
+from app.core.cache import user_cache
+from app.core.logging import bind_log_context
+from app.core.metrics import password_hash_duration
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
@@ -26,6 +31,60 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _timed(func: Callable[..., Any], *args: Any) -> Any:
+    with password_hash_duration.time(func.__name__):
+        return func(*args)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded thread pool.
+
+    bcrypt releases the GIL, so threads scale across cores. Once more than
+    ``max_pending`` operations are queued, new calls are rejected with 503
+    instead of piling up behind the pool.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + queue_size
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again in a moment.",
+                headers={"Retry-After": "1"},
+            )
+        
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, _timed, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -39,8 +98,8 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     return encoded_jwt
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_read_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     try:
@@ -62,7 +121,13 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    user_id = int(token_data.sub)
+    bind_log_context(user_id=user_id)
+    user = await user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,9 +135,24 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await user_cache.set(user)
     return user
 
 
+def is_organizer(user: User) -> bool:
+    organizers = {email.strip().lower() for email in settings.ORGANIZER_EMAILS.split(",") if email.strip()}
+    return user.email.lower() in organizers
+
+
+async def get_current_organizer(current_user: User = Depends(get_current_user)) -> User:
+    if not is_organizer(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organizers can do this",
+        )
+    return current_user
+
+
 def generate_csrf_token() -> str:
     return secrets.token_hex(32)
 
@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.stats import get_participant_stats, has_participant_stats, rebuild_participant_stats
+from app.crud.change_version import get_users_version
+from app.crud.user import count_users
+from app.models.user import GenderEnum
+from app.schemas.stats import DimensionStats, ParticipantStats, StatCount
+
+logger = logging.getLogger(__name__)
+
+# (youngest age, oldest age, label); None leaves the bracket open
+AGE_BRACKETS = [
+    (None, 17, "Under 18"),
+    (18, 24, "18–24"),
+    (25, 34, "25–34"),
+    (35, 44, "35–44"),
+    (45, 54, "45–54"),
+    (55, 64, "55–64"),
+    (65, None, "65+"),
+]
+
+
+def age_in_month(birth_month: str, today: date) -> int:
+    """Age of someone born in ``birth_month`` ("YYYY-MM"), counting this month's birthdays as passed"""
+    year, month = (int(part) for part in birth_month.split("-"))
+    return today.year - year - (today.month < month)
+
+
+def age_bracket(age: int) -> str:
+    for youngest, oldest, label in AGE_BRACKETS:
+        if (youngest is None or age >= youngest) and (oldest is None or age <= oldest):
+            return label
+    return AGE_BRACKETS[-1][2]
+
+
+def _top(counts: Dict[str, int], limit: int) -> DimensionStats:
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return DimensionStats(
+        top=[StatCount(value=value, count=count) for value, count in ranked[:limit]],
+        other=sum(count for _, count in ranked[limit:]),
+        distinct=len(ranked),
+    )
+
+
+def build_participant_stats(
+    rows: List[Tuple[str, str, int]], today: date, updated_at: Optional[datetime] = None
+) -> ParticipantStats:
+    by_dimension: Dict[str, Dict[str, int]] = {}
+    for dimension, value, count in rows:
+        by_dimension.setdefault(dimension, {})[value] = count
+
+    genders = by_dimension.get("gender", {})
+    ages: Counter = Counter()
+    for birth_month, count in by_dimension.get("birth_month", {}).items():
+        ages[age_bracket(age_in_month(birth_month, today))] += count
+
+    return ParticipantStats(
+        total=sum(genders.values()),
+        genders=[StatCount(value=gender.value, count=genders.get(gender.value, 0)) for gender in GenderEnum],
+        age_brackets=[StatCount(value=label, count=ages[label]) for _, _, label in AGE_BRACKETS],
+        nationalities=_top(by_dimension.get("nationality", {}), settings.STATS_TOP_VALUES),
+        organizations=_top(by_dimension.get("organization", {}), settings.STATS_TOP_VALUES),
+        updated_at=updated_at,
+    )
+
+
+class ParticipantStatsView:
+    """The statistics as served, rebuilt from the counters only when users change.
+
+    Each request costs one primary-key read of the users change version;
+    the counters are read again only after a write to users (or when the
+    date changes, which moves people between age brackets). Neither depends
+    on how many participants there are.
+    """
+
+    def __init__(self):
+        self.key: Optional[Tuple[int, date]] = None
+        self.stats: Optional[ParticipantStats] = None
+
+    async def get(self, db: AsyncSession) -> Tuple[ParticipantStats, int]:
+        """Return (statistics, users version they reflect)"""
+        version, changed_at = await get_users_version(db)
+        today = datetime.utcnow().date()
+        if self.key != (version, today):
+            stats = build_participant_stats(await get_participant_stats(db), today, changed_at)
+            self.stats, self.key = stats, (version, today)
+        return self.stats, version
+
+
+participant_stats = ParticipantStatsView()
+
+
+async def ensure_participant_stats() -> None:
+    """Count the participants once for a database that predates the counters"""
+    async with AsyncSessionLocal() as db:
+        if await has_participant_stats(db) or not await count_users(db):
+            return
+        total = await rebuild_participant_stats(db)
+    logger.info(f"Participant statistics built for {total} participants")
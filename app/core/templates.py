@@ -0,0 +1,80 @@
+from pathlib import Path
+from typing import Any, List
+import logging
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.config import settings
+from app.core.assets import asset_url
+from app.core.avatars import avatar_url
+from app.core.cache import fragment_cache
+from app.core.metrics import template_render_duration
+from app.core.security import is_organizer
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = "app/templates"
+
+
+class FragmentCacheExtension(Extension):
+    """Adds ``{% cache "namespace", key, ... %}...{% endcache %}``.
+
+    The rendered body is stored in app.core.cache.fragment_cache under the
+    namespace and key parts; ``fragment_cache.invalidate("namespace")``
+    drops every fragment of that namespace.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, args: List[Any], caller) -> Markup:
+        namespace, *parts = args
+        return Markup(fragment_cache.get_or_render(namespace, tuple(parts), caller))
+
+
+class TimedTemplate(Template):
+    """Template that records its render time in template_render_duration"""
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        with template_render_duration.time(self.name or "<string>"):
+            return super().render(*args, **kwargs)
+
+
+def create_environment() -> Environment:
+    cache_dir = Path(settings.TEMPLATE_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+        bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+        extensions=[FragmentCacheExtension],
+    )
+    env.template_class = TimedTemplate
+    env.globals["asset_url"] = asset_url
+    env.globals["avatar_url"] = avatar_url
+    env.globals["is_organizer"] = is_organizer
+    return env
+
+
+templates = Jinja2Templates(env=create_environment())
+
+
+def precompile_templates() -> None:
+    """Load every template once so the first requests don't pay for compilation"""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    logger.info(f"Precompiled {len(names)} templates")
@@ -1,9 +1,11 @@
 from datetime import datetime
 from typing import Dict, Optional
+import logging
 import re
 
 from app.models.user import GenderEnum
-from app.core.logging import logger
+
+logger = logging.getLogger(__name__)
 
 def validate_password(password: str, password_confirm: Optional[str] = None) -> Dict[str, str]:
     errors = {}
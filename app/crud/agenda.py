@@ -0,0 +1,173 @@
+from datetime import datetime
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+
+from app.core.database import sqlite_write_lock
+from app.models.agenda import AgendaSession, Reservation
+from app.schemas.agenda import AgendaSessionCreate, AgendaSessionUpdate
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy. Please try again in a moment.",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def create_session(db: AsyncSession, session_data: AgendaSessionCreate) -> AgendaSession:
+    db_session = AgendaSession(**session_data.model_dump(), seats_taken=0)
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    return db_session
+
+
+async def get_session(db: AsyncSession, session_id: int) -> Optional[AgendaSession]:
+    return await db.get(AgendaSession, session_id)
+
+
+async def get_sessions(db: AsyncSession) -> List[AgendaSession]:
+    result = await db.execute(select(AgendaSession).order_by(AgendaSession.starts_at, AgendaSession.id))
+    return list(result.scalars())
+
+
+async def update_session(db: AsyncSession, session_id: int, session_data: AgendaSessionUpdate) -> Optional[AgendaSession]:
+    db_session = await get_session(db, session_id)
+    if not db_session:
+        return None
+
+    update_data = session_data.model_dump(exclude_unset=True)
+    starts_at = update_data.get("starts_at", db_session.starts_at)
+    ends_at = update_data.get("ends_at", db_session.ends_at)
+    if ends_at <= starts_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Session must end after it starts",
+        )
+
+    capacity = update_data.pop("capacity", None)
+    for field, value in update_data.items():
+        setattr(db_session, field, value)
+
+    if capacity is not None:
+        # Conditional, so a reservation committed meanwhile can't end up above the new cap
+        result = await db.execute(
+            update(AgendaSession)
+            .where(AgendaSession.id == session_id, AgendaSession.seats_taken <= capacity)
+            .values(capacity=capacity)
+        )
+        if not result.rowcount:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Capacity can't be lower than the seats already reserved",
+            )
+
+    await db.commit()
+    await db.refresh(db_session)
+    return db_session
+
+
+async def delete_session(db: AsyncSession, session_id: int) -> bool:
+    await db.execute(delete(Reservation).where(Reservation.session_id == session_id))
+    result = await db.execute(delete(AgendaSession).where(AgendaSession.id == session_id))
+    await db.commit()
+    return bool(result.rowcount)
+
+
+async def get_reserved_session_ids(db: AsyncSession, user_id: int) -> Set[int]:
+    result = await db.execute(select(Reservation.session_id).where(Reservation.user_id == user_id))
+    return set(result.scalars())
+
+
+async def reserve_seat(db: AsyncSession, session_id: int, user_id: int) -> Tuple[Reservation, int]:
+    """Take one seat in a session; returns the reservation and the seats left.
+
+    The seat count only changes through one conditional UPDATE
+    (``seats_taken < capacity``), applied atomically by the database, and
+    the reservation row is inserted in the same transaction; a repeated
+    request trips the unique constraint and rolls the seat back. The read
+    beforehand turns away full sessions and repeats without taking the
+    write lock, which is what most requests get once a session fills up.
+    """
+    now = datetime.utcnow()
+    row = (await db.execute(
+        select(
+            AgendaSession.capacity,
+            AgendaSession.seats_taken,
+            AgendaSession.registration_opens_at,
+            Reservation.id.label("reservation_id"),
+        )
+        .outerjoin(Reservation, and_(Reservation.session_id == AgendaSession.id, Reservation.user_id == user_id))
+        .where(AgendaSession.id == session_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    if row.reservation_id is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You already have a seat in this session")
+    if row.registration_opens_at and row.registration_opens_at > now:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Registration opens at {row.registration_opens_at:%Y-%m-%d %H:%M} UTC",
+        )
+    if row.seats_taken >= row.capacity:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This session is full")
+
+    try:
+        async with sqlite_write_lock():
+            result = await db.execute(
+                update(AgendaSession)
+                .where(
+                    AgendaSession.id == session_id,
+                    AgendaSession.seats_taken < AgendaSession.capacity,
+                    or_(AgendaSession.registration_opens_at.is_(None), AgendaSession.registration_opens_at <= now),
+                )
+                .values(seats_taken=AgendaSession.seats_taken + 1)
+            )
+            if not result.rowcount:
+                await db.rollback()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This session is full")
+
+            reservation = Reservation(session_id=session_id, user_id=user_id, created_at=now)
+            db.add(reservation)
+            await db.flush()
+            seats_left = await db.scalar(
+                select(AgendaSession.capacity - AgendaSession.seats_taken).where(AgendaSession.id == session_id)
+            )
+            await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="You already have a seat in this session")
+    except OperationalError:
+        # Lock wait exceeded (SQLite busy_timeout); nothing was committed
+        await db.rollback()
+        raise _busy()
+
+    return reservation, seats_left
+
+
+async def cancel_reservation(db: AsyncSession, session_id: int, user_id: int) -> bool:
+    try:
+        async with sqlite_write_lock():
+            result = await db.execute(
+                delete(Reservation).where(Reservation.session_id == session_id, Reservation.user_id == user_id)
+            )
+            if not result.rowcount:
+                await db.rollback()
+                return False
+
+            await db.execute(
+                update(AgendaSession)
+                .where(AgendaSession.id == session_id, AgendaSession.seats_taken > 0)
+                .values(seats_taken=AgendaSession.seats_taken - 1)
+            )
+            await db.commit()
+    except OperationalError:
+        await db.rollback()
+        raise _busy()
+
+    return True
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change_version import ChangeVersion
+
+USERS_VERSION = "users"
+
+
+async def get_users_version(db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """Return (version, last change time) of the users table"""
+    row = await db.get(ChangeVersion, USERS_VERSION, populate_existing=True)
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def _upsert_bumping_version(dialect_name: str):
+    # One statement, so concurrent first writes can't both try to create the row
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(ChangeVersion)
+        return statement.on_conflict_do_update(
+            index_elements=[ChangeVersion.name],
+            set_={"version": ChangeVersion.version + 1, "updated_at": statement.excluded.updated_at},
+        )
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        statement = postgresql_insert(ChangeVersion)
+        return statement.on_conflict_do_update(
+            index_elements=[ChangeVersion.name],
+            set_={"version": ChangeVersion.version + 1, "updated_at": statement.excluded.updated_at},
+        )
+    from sqlalchemy.dialects.mysql import insert as mysql_insert
+    statement = mysql_insert(ChangeVersion)
+    return statement.on_duplicate_key_update(
+        version=ChangeVersion.version + 1, updated_at=statement.inserted.updated_at
+    )
+
+
+async def bump_users_version(db: AsyncSession) -> None:
+    await db.execute(
+        _upsert_bumping_version(db.bind.dialect.name),
+        {"name": USERS_VERSION, "version": 1, "updated_at": datetime.utcnow()},
+    )
@@ -0,0 +1,84 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.database import AsyncReadSessionLocal
+from app.models.checkin import CheckIn
+from app.models.user import User
+
+BADGE_COLUMNS = [
+    User.id,
+    User.first_name,
+    User.last_name,
+    User.organization,
+    CheckIn.checked_in_at,
+]
+
+
+def _badge_query():
+    return select(*BADGE_COLUMNS).outerjoin(CheckIn, CheckIn.user_id == User.id)
+
+
+async def stream_badge_entries(batch_size: int = 1000) -> AsyncIterator[List[Any]]:
+    """Yield batches of (id, names, organization, check-in time) for every participant"""
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(_badge_query().order_by(User.id).execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def get_badge_entry(db: AsyncSession, user_id: int) -> Optional[Any]:
+    result = await db.execute(_badge_query().where(User.id == user_id))
+    return result.first()
+
+
+def _upsert_keeping_earliest(dialect_name: str):
+    # The device stays the one that recorded the check-in on record
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(CheckIn)
+        return statement.on_conflict_do_update(
+            index_elements=[CheckIn.user_id],
+            set_={"checked_in_at": func.min(CheckIn.checked_in_at, statement.excluded.checked_in_at)},
+        )
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        statement = postgresql_insert(CheckIn)
+        return statement.on_conflict_do_update(
+            index_elements=[CheckIn.user_id],
+            set_={"checked_in_at": func.least(CheckIn.checked_in_at, statement.excluded.checked_in_at)},
+        )
+    from sqlalchemy.dialects.mysql import insert as mysql_insert
+    statement = mysql_insert(CheckIn)
+    return statement.on_duplicate_key_update(
+        checked_in_at=func.least(CheckIn.checked_in_at, statement.inserted.checked_in_at)
+    )
+
+
+async def insert_check_ins(db: AsyncSession, values: List[Dict[str, Any]]) -> None:
+    """Insert many check-ins in one statement; participants already checked in keep the earliest time"""
+    await db.execute(_upsert_keeping_earliest(db.bind.dialect.name), values)
+    await db.commit()
+
+
+BADGE_PRINT_COLUMNS = [
+    User.id,
+    User.first_name,
+    User.last_name,
+    User.organization,
+    User.position,
+]
+
+
+async def stream_badge_print_rows(after_id: int = 0, batch_size: int = 1000) -> AsyncIterator[List[Any]]:
+    """Yield batches of (id, names, organization, position) for participants with ids above ``after_id``"""
+    query = select(*BADGE_PRINT_COLUMNS).where(User.id > after_id).order_by(User.id)
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def count_participants_after(db: AsyncSession, after_id: int = 0) -> int:
+    result = await db.execute(select(func.count(User.id)).where(User.id > after_id))
+    return result.scalar_one()
@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import date
+from typing import Any, Iterable, List, Tuple
+
+from sqlalchemy import delete, extract, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.change_version import bump_users_version
+from app.models.stats import ParticipantStat
+from app.models.user import User
+
+# Age is derived from the birth month when the statistics are read, so the
+# counters never go stale as participants get older
+DIMENSIONS = ("gender", "nationality", "organization", "birth_month")
+
+StatKey = Tuple[str, str]
+
+
+def _birth_month(year: int, month: int) -> str:
+    return f"{int(year):04d}-{int(month):02d}"
+
+
+def participant_stat_keys(gender: Any, nationality: str, organization: str, birth_date: date) -> List[StatKey]:
+    """The (dimension, value) counters one participant contributes to"""
+    return [
+        ("gender", getattr(gender, "value", gender)),
+        ("nationality", nationality),
+        ("organization", organization),
+        ("birth_month", _birth_month(birth_date.year, birth_date.month)),
+    ]
+
+
+def user_stat_keys(user: Any) -> List[StatKey]:
+    return participant_stat_keys(user.gender, user.nationality, user.organization, user.birth_date)
+
+
+def _upsert_adding_counts(dialect_name: str):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(ParticipantStat)
+        return statement.on_conflict_do_update(
+            index_elements=[ParticipantStat.dimension, ParticipantStat.value],
+            set_={"count": ParticipantStat.count + statement.excluded.count},
+        )
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        statement = postgresql_insert(ParticipantStat)
+        return statement.on_conflict_do_update(
+            index_elements=[ParticipantStat.dimension, ParticipantStat.value],
+            set_={"count": ParticipantStat.count + statement.excluded.count},
+        )
+    from sqlalchemy.dialects.mysql import insert as mysql_insert
+    statement = mysql_insert(ParticipantStat)
+    return statement.on_duplicate_key_update(count=ParticipantStat.count + statement.inserted.count)
+
+
+async def apply_stat_changes(db: AsyncSession, changes: Counter) -> None:
+    """Add the per-(dimension, value) deltas to the counters; the caller commits"""
+    values = [
+        {"dimension": dimension, "value": value, "count": delta}
+        for (dimension, value), delta in changes.items()
+        if delta
+    ]
+    if values:
+        await db.execute(_upsert_adding_counts(db.bind.dialect.name), values)
+
+
+def stat_changes(old_keys: Iterable[StatKey], new_keys: Iterable[StatKey]) -> Counter:
+    changes: Counter = Counter(new_keys)
+    changes.subtract(old_keys)
+    return changes
+
+
+async def get_participant_stats(db: AsyncSession) -> List[Tuple[str, str, int]]:
+    """Every non-zero counter as (dimension, value, count)"""
+    result = await db.execute(
+        select(ParticipantStat.dimension, ParticipantStat.value, ParticipantStat.count)
+        .where(ParticipantStat.count > 0)
+    )
+    return [tuple(row) for row in result]
+
+
+async def has_participant_stats(db: AsyncSession) -> bool:
+    result = await db.execute(select(ParticipantStat.dimension).limit(1))
+    return result.first() is not None
+
+
+async def rebuild_participant_stats(db: AsyncSession) -> int:
+    """Recount every dimension in one GROUP BY pass over users; returns the participant count.
+
+    The counters are cleared first, so on SQLite the whole rebuild holds the
+    write lock and registrations made meanwhile wait for it.
+    """
+    await db.execute(delete(ParticipantStat))
+    result = await db.execute(
+        select(
+            User.gender,
+            User.nationality,
+            User.organization,
+            extract("year", User.birth_date),
+            extract("month", User.birth_date),
+            func.count(User.id),
+        ).group_by(
+            User.gender,
+            User.nationality,
+            User.organization,
+            extract("year", User.birth_date),
+            extract("month", User.birth_date),
+        )
+    )
+    counts: Counter = Counter()
+    for gender, nationality, organization, year, month, count in result:
+        counts[("gender", gender.value)] += count
+        counts[("nationality", nationality)] += count
+        counts[("organization", organization)] += count
+        counts[("birth_month", _birth_month(year, month))] += count
+
+    if counts:
+        await db.execute(insert(ParticipantStat), [
+            {"dimension": dimension, "value": value, "count": count}
+            for (dimension, value), count in counts.items()
+        ])
+    # The served statistics are cached per users version; have every worker reread them
+    await bump_users_version(db)
+    await db.commit()
+    return sum(count for (dimension, _), count in counts.items() if dimension == "gender")
@@ -1,20 +1,70 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from collections import Counter
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 from fastapi import HTTPException, status
 
 from app.models.user import User, GenderEnum
-from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.schemas.user import UserCreate, UserUpdate, UserFilter
+from app.core.security import get_password_hash_async, verify_password_async
+from app.core.badges import badge_index
+from app.core.cache import user_cache, fragment_cache
+from app.core.database import AsyncReadSessionLocal
+from app.crud.change_version import bump_users_version
+from app.crud.stats import apply_stat_changes, stat_changes, user_stat_keys, participant_stat_keys
+from app.core.pagination import Page, DIRECTION_NEXT, DIRECTION_PREV, encode_cursor, decode_cursor
 
+SORT_COLUMNS = {
+    "id": User.id,
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "organization": User.organization,
+    "nationality": User.nationality,
+    "position": User.position,
+}
 
-def create_user(db: Session, user_data: UserCreate) -> User:
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+EXPORT_COLUMNS = [
+    User.id,
+    User.first_name,
+    User.last_name,
+    User.gender,
+    User.nationality,
+    User.organization,
+    User.position,
+    User.birth_date,
+    User.email,
+]
+
+
+def _apply_filters(query, filters: Optional[UserFilter]):
+    if filters is None:
+        return query
+
+    for field in ("organization", "nationality", "gender", "position"):
+        value = getattr(filters, field)
+        if value:
+            query = query.where(getattr(User, field) == value)
+
+    if filters.name:
+        # Range scan on lower(name) so the expression indexes are usable
+        prefix = filters.name.strip().lower()
+        upper = prefix + "\U0010ffff"
+        query = query.where(or_(
+            and_(func.lower(User.first_name) >= prefix, func.lower(User.first_name) < upper),
+            and_(func.lower(User.last_name) >= prefix, func.lower(User.last_name) < upper),
+        ))
+
+    return query
+
+
+async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
+    db_user = await get_user_by_email(db, user_data.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    
+
     db_user = User(
         first_name=user_data.first_name,
         last_name=user_data.last_name,
@@ -24,55 +74,199 @@ def create_user(db: Session, user_data: UserCreate) -> User:
         position=user_data.position,
         birth_date=user_data.birth_date,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
     )
-    
+
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
+    await apply_stat_changes(db, Counter(user_stat_keys(db_user)))
+    await bump_users_version(db)
+    await db.commit()
+    await db.refresh(db_user)
+    fragment_cache.invalidate("users")
+    badge_index.add(db_user)
+
     return db_user
 
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+def _sort_key(user: User, sort: str) -> Tuple:
+    if sort == "id":
+        return (user.id,)
+    return (getattr(user, sort), user.id)
+
+
+async def get_users(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = False,
+    filters: Optional[UserFilter] = None,
+) -> Page:
+    """Return one keyset-paginated page of users ordered by (sort, id).
+
+    Pages are located by the last seen sort key rather than an offset, so
+    every page costs the same index range scan no matter how deep it is.
+    """
+    column = SORT_COLUMNS[sort]
+    direction = DIRECTION_NEXT
+    query = _apply_filters(select(User), filters)
+
+    if cursor:
+        key, direction = decode_cursor(cursor)
+        if len(key) != (1 if sort == "id" else 2):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor",
+            )
+        # Walking backwards flips the comparison and the ordering
+        forward = (direction == DIRECTION_NEXT) != descending
+        if sort == "id":
+            query = query.where(User.id > key[0] if forward else User.id < key[0])
+        elif forward:
+            query = query.where(or_(column > key[0], and_(column == key[0], User.id > key[1])))
+        else:
+            query = query.where(or_(column < key[0], and_(column == key[0], User.id < key[1])))
+
+    reverse = (direction == DIRECTION_PREV) != descending
+    order = [column.desc(), User.id.desc()] if reverse else [column.asc(), User.id.asc()]
+    if sort == "id":
+        order = order[1:]
+
+    result = await db.execute(query.order_by(*order).limit(limit + 1))
+    users = list(result.scalars().all())
+
+    has_more = len(users) > limit
+    users = users[:limit]
+    if direction == DIRECTION_PREV:
+        users.reverse()
+        has_next, has_prev = cursor is not None, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    if not users:
+        if not cursor:
+            return Page(items=[], next_cursor=None, prev_cursor=None)
+        # Nothing past a stale cursor (or the rows behind it were deleted):
+        # link back from the same key toward the side where the rows are
+        if direction == DIRECTION_NEXT:
+            return Page(items=[], next_cursor=None, prev_cursor=encode_cursor(key, DIRECTION_PREV))
+        return Page(items=[], next_cursor=encode_cursor(key, DIRECTION_NEXT), prev_cursor=None)
+
+    return Page(
+        items=users,
+        next_cursor=encode_cursor(_sort_key(users[-1], sort), DIRECTION_NEXT) if has_next else None,
+        prev_cursor=encode_cursor(_sort_key(users[0], sort), DIRECTION_PREV) if has_prev else None,
+    )
+
 
+async def stream_users(
+    filters: Optional[UserFilter] = None, batch_size: int = 1000
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield batches of users as plain rows, read from a server-side cursor.
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+    Opens its own session because it outlives the request dependencies
+    when consumed by a StreamingResponse.
+    """
+    query = _apply_filters(select(*EXPORT_COLUMNS), filters).order_by(User.id)
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            yield partition
 
 
-def update_user(db: Session, user_id: int, user_data: UserUpdate) -> Optional[User]:
-    db_user = get_user(db, user_id)
+async def count_users(db: AsyncSession, filters: Optional[UserFilter] = None) -> int:
+    result = await db.execute(_apply_filters(select(func.count(User.id)), filters))
+    return result.scalar_one()
+
+
+async def get_existing_emails(db: AsyncSession, emails: Iterable[str], chunk_size: int = 500) -> Set[str]:
+    """Return which of the given emails are already registered"""
+    emails = list(emails)
+    existing = set()
+    for start in range(0, len(emails), chunk_size):
+        result = await db.execute(
+            select(User.email).where(User.email.in_(emails[start:start + chunk_size]))
+        )
+        existing.update(result.scalars().all())
+    return existing
+
+
+async def insert_users(db: AsyncSession, values: List[Dict[str, Any]]) -> None:
+    """Insert many users in one executemany statement and transaction"""
+    await db.execute(insert(User), values)
+    await apply_stat_changes(db, Counter(
+        key
+        for row in values
+        for key in participant_stat_keys(row["gender"], row["nationality"], row["organization"], row["birth_date"])
+    ))
+    await bump_users_version(db)
+    await db.commit()
+    fragment_cache.invalidate("users")
+
+
+async def update_user(db: AsyncSession, user_id: int, user_data: UserUpdate) -> Optional[User]:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
-    
+
     update_data = user_data.model_dump(exclude_unset=True)
-    
+
     if "password" in update_data and update_data["password"]:
-        update_data["hashed_password"] = get_password_hash(update_data["password"])
+        update_data["hashed_password"] = await get_password_hash_async(update_data["password"])
         del update_data["password"]
-    
+
     if "password_confirm" in update_data:
         del update_data["password_confirm"]
-    
+
+    old_stat_keys = user_stat_keys(db_user)
     for field, value in update_data.items():
         setattr(db_user, field, value)
-    
-    db.commit()
-    db.refresh(db_user)
-    
+
+    await apply_stat_changes(db, stat_changes(old_stat_keys, user_stat_keys(db_user)))
+    await bump_users_version(db)
+    await db.commit()
+    await db.refresh(db_user)
+    await user_cache.invalidate(user_id)
+    fragment_cache.invalidate("users")
+    badge_index.add(db_user)
+
     return db_user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    user = get_user_by_email(db, email)
+async def update_user_avatar(db: AsyncSession, user_id: int, avatar: str) -> Optional[User]:
+    db_user = await get_user(db, user_id)
+    if not db_user:
+        return None
+
+    db_user.avatar = avatar
+    await bump_users_version(db)
+    await db.commit()
+    await user_cache.invalidate(user_id)
+    fragment_cache.invalidate("users")
+
+    return db_user
+
+
+async def reset_user_password(db: AsyncSession, user: User, password: str) -> User:
+    user.hashed_password = await get_password_hash_async(password)
+    await db.commit()
+    await user_cache.invalidate(user.id)
+    return user
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
-    return user 
\ No newline at end of file
+    return user
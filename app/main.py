@@ -1,23 +1,70 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
 from app.api.api import api_router
 from app.web import router as web_router
 from app.config import settings
-from app.core.database import engine, Base
+from app.core.admission import AdmissionMiddleware, admission
+from app.core.database import async_engine, check_database, dispose_engines, init_db, read_engine
+from app.core.assets import asset_manifest, PrecompressedStaticFiles
+from app.core.badges import badge_index, checkin_recorder
+from app.core.cache import user_cache
+from app.core.avatars import AVATAR_URL_PREFIX, AvatarFiles, avatar_store
+from app.core.middleware import GZipMiddleware, RequestLoggingMiddleware, SecurityHeadersMiddleware
+from app.core.metrics import MetricsMiddleware, exporter, registry
+from app.core.rate_limit import login_attempts
+from app.core.security import password_hasher
+from app.core.email import mail_queue
+from app.core.reset_codes import sweep_reset_codes
+from app.core.stats import ensure_participant_stats
+from app.core.templates import templates, precompile_templates
+from app.server import PREPARED_ENV
+
+if os.environ.get(PREPARED_ENV) == "1":
+    # Started by app.server, which already did both before starting the workers
+    asset_manifest.load()
+else:
+    init_db()
+    asset_manifest.build()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    precompile_templates()
+    await badge_index.load()
+    await ensure_participant_stats()
+    mail_queue.start()
+    checkin_recorder.start()
+    sweeper = asyncio.create_task(sweep_reset_codes())
+    metrics_writer = asyncio.create_task(exporter.run())
+    yield
+    sweeper.cancel()
+    metrics_writer.cancel()
+    # uvicorn has drained in-flight requests by now; flush what they queued
+    await mail_queue.stop()
+    await checkin_recorder.stop()
+    exporter.remove()
+    await dispose_engines()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+if settings.ADMISSION_ENABLED:
+    # Innermost: inside the session so a refused form post can leave a flash
+    # message, and inside the security headers so its redirects get them too
+    app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     SessionMiddleware,
     secret_key=settings.SECRET_KEY,
@@ -35,16 +82,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+if settings.GZIP_ENABLED:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_LEVEL,
+    )
+
+app.add_middleware(SecurityHeadersMiddleware)
+
+app.add_middleware(RequestLoggingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(asset_manifest, max_age=settings.STATIC_MAX_AGE),
+    name="static",
+)
+
+app.mount(
+    AVATAR_URL_PREFIX,
+    AvatarFiles(avatar_store, max_age=settings.STATIC_MAX_AGE),
+    name="avatars",
+)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 app.include_router(web_router)
 
 
+registry.gauge("mail_queue_depth", "Emails waiting for delivery", lambda: mail_queue.stats()["queue_depth"])
+registry.gauge("avatar_thumbnails_pending", "Avatar uploads being resized or queued", lambda: avatar_store.pending)
+registry.gauge("user_cache_hits", "User cache lookups answered from the cache since start", lambda: user_cache.hits)
+registry.gauge("user_cache_misses", "User cache lookups that went to the database since start", lambda: user_cache.misses)
+registry.gauge("user_cache_size", "Users held in this worker's local cache", lambda: user_cache.stats().get("size", 0))
+registry.gauge("login_rate_limit_tracked_keys", "Client IPs and emails tracked by the login rate limit", lambda: login_attempts.stats()["tracked_keys"])
+registry.gauge("login_rate_limit_memory_bytes", "Approximate memory held by the login rate limit", lambda: login_attempts.stats()["approx_memory_bytes"])
+registry.gauge("admission_active", "Gated requests running", lambda: admission.active)
+registry.gauge("admission_queued", "Gated requests waiting for a slot", lambda: len(admission.waiters))
+registry.gauge("admission_waiting_room", "Waiting-room tickets not yet admitted", lambda: admission.waiting)
+registry.gauge("checkin_pending_writes", "Check-ins buffered for the next batch write", lambda: len(checkin_recorder.pending))
+registry.gauge("password_hash_pending", "bcrypt operations running or queued", lambda: password_hasher.pending)
+registry.gauge("db_pool_checked_out", "Database connections in use", lambda: getattr(async_engine.pool, "checkedout", lambda: 0)())
+registry.gauge("db_read_pool_checked_out", "Read-only database connections in use", lambda: getattr(read_engine.pool, "checkedout", lambda: 0)() if read_engine is not async_engine else 0)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(exporter.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness: the worker's event loop is responding"""
+    return {"status": "ok"}
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness: the database answers; reports the connection pools"""
+    databases = await check_database()
+    ok = all(result["ok"] for result in databases.values())
+    return JSONResponse(
+        {
+            "status": "ok" if ok else "unavailable",
+            "database": databases,
+            "mail_queue": mail_queue.stats(),
+            "admission": admission.stats(),
+            "login_rate_limit": login_attempts.stats(),
+            "user_cache": user_cache.stats(),
+        },
+        status_code=200 if ok else 503,
+        headers={"Cache-Control": "no-store"},
+    )
+
+
 @app.exception_handler(404)
 async def not_found_exception_handler(request: Request, exc: Exception):
-    templates = Jinja2Templates(directory="app/templates")
     return templates.TemplateResponse(
         "404.html",
         {"request": request},
@@ -52,28 +170,5 @@ async def not_found_exception_handler(request: Request, exc: Exception):
     )
 
 
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "script-src 'self' https://cdn.jsdelivr.net; "
-        "style-src 'self' https://cdn.jsdelivr.net; "
-        "img-src 'self' data:; "
-        "font-src 'self' https://cdn.jsdelivr.net; "
-        "connect-src 'self'; "
-        "frame-ancestors 'none'; "
-        "form-action 'self';"
-    )
-    
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    
-    return response
-
-
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,46 @@
+from datetime import datetime
+from sqlalchemy import CheckConstraint, Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+
+from app.core.database import Base
+from app.models.user import User
+
+
+class AgendaSession(Base):
+    """A talk or workshop on the conference agenda, with a hard seat cap"""
+
+    __tablename__ = "agenda_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False, default="")
+    speaker = Column(String, nullable=False, default="")
+    room = Column(String, nullable=False, default="")
+    starts_at = Column(DateTime, nullable=False, index=True)
+    ends_at = Column(DateTime, nullable=False)
+    capacity = Column(Integer, nullable=False)
+    # Maintained by app.crud.agenda with conditional updates; the check
+    # constraint makes an oversold session impossible to commit
+    seats_taken = Column(Integer, nullable=False, default=0)
+    registration_opens_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        CheckConstraint("seats_taken >= 0 AND seats_taken <= capacity", name="ck_agenda_sessions_seats"),
+    )
+
+    @property
+    def seats_left(self) -> int:
+        return max(self.capacity - self.seats_taken, 0)
+
+
+class Reservation(Base):
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("agenda_sessions.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey(User.id, ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("session_id", "user_id", name="uq_reservations_session_user"),
+    )
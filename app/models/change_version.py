@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Integer, DateTime
+
+from app.core.database import Base
+
+
+class ChangeVersion(Base):
+    """Per-table change counter, bumped in the same transaction as each write"""
+
+    __tablename__ = "change_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.core.database import Base
+from app.models.user import User
+
+
+class CheckIn(Base):
+    """A participant's arrival at the venue; the earliest recorded scan wins"""
+
+    __tablename__ = "check_ins"
+
+    user_id = Column(Integer, ForeignKey(User.id, ondelete="CASCADE"), primary_key=True)
+    checked_in_at = Column(DateTime, nullable=False)
+    # Scanner that recorded it, as reported by the device
+    device = Column(String, nullable=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer, DateTime
+
+from app.core.database import Base
+
+
+class PasswordResetCode(Base):
+    __tablename__ = "password_reset_codes"
+
+    email = Column(String, primary_key=True)
+    code_hash = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.database import Base
+
+
+class ParticipantStat(Base):
+    """How many participants share a value of one dimension (gender, nationality, ...).
+
+    Kept up to date in the same transaction as each write to users, and
+    rebuilt from scratch by app.crud.stats.rebuild_participant_stats.
+    """
+
+    __tablename__ = "participant_stats"
+
+    dimension = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Date, Integer, Enum
+from datetime import datetime
+from sqlalchemy import Column, String, Date, DateTime, Integer, Enum, Index, func
 import enum
 
 from app.core.database import Base
@@ -23,6 +24,22 @@ class User(Base):
     birth_date = Column(Date, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # SHA-256 of the uploaded picture; see app.core.avatars
+    avatar = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Composite (column, id) indexes back both the equality filters and the
+    # keyset pagination order used by app.crud.user.get_users.
+    __table_args__ = (
+        Index("ix_users_first_name_id", "first_name", "id"),
+        Index("ix_users_last_name_id", "last_name", "id"),
+        Index("ix_users_organization_id", "organization", "id"),
+        Index("ix_users_nationality_id", "nationality", "id"),
+        Index("ix_users_position_id", "position", "id"),
+        Index("ix_users_gender_id", "gender", "id"),
+        Index("ix_users_first_name_lower", func.lower(first_name)),
+        Index("ix_users_last_name_lower", func.lower(last_name)),
+    )
     
     @property
     def full_name(self):
@@ -0,0 +1,67 @@
+from typing import Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, validator, Field
+
+
+def _naive_utc(v: Optional[datetime]) -> Optional[datetime]:
+    # Session times are stored and compared as naive UTC, like datetime.utcnow()
+    if v is not None and v.tzinfo is not None:
+        return v.astimezone(timezone.utc).replace(tzinfo=None)
+    return v
+
+
+class AgendaSessionBase(BaseModel):
+    title: str = Field(..., min_length=1)
+    description: str = ""
+    speaker: str = ""
+    room: str = ""
+    starts_at: datetime
+    ends_at: datetime
+    capacity: int = Field(..., gt=0)
+    registration_opens_at: Optional[datetime] = None
+
+    @validator('starts_at', 'ends_at', 'registration_opens_at')
+    def times_naive_utc(cls, v):
+        return _naive_utc(v)
+
+    @validator('ends_at')
+    def ends_after_start(cls, v, values, **kwargs):
+        if 'starts_at' in values and v <= values['starts_at']:
+            raise ValueError('Session must end after it starts')
+        return v
+
+
+class AgendaSessionCreate(AgendaSessionBase):
+    pass
+
+
+class AgendaSessionUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=1)
+    description: Optional[str] = None
+    speaker: Optional[str] = None
+    room: Optional[str] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    capacity: Optional[int] = Field(None, gt=0)
+    registration_opens_at: Optional[datetime] = None
+
+    @validator('starts_at', 'ends_at', 'registration_opens_at')
+    def times_naive_utc(cls, v):
+        return _naive_utc(v)
+
+
+class AgendaSessionResponse(AgendaSessionBase):
+    id: int
+    seats_taken: int
+    seats_left: int
+    reserved: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class ReservationResponse(BaseModel):
+    session_id: int
+    user_id: int
+    created_at: datetime
+    seats_left: int
@@ -0,0 +1,59 @@
+from typing import List, Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, validator
+
+from app.config import settings
+
+
+class BadgeResponse(BaseModel):
+    user_id: int
+    token: str
+
+
+class CheckInRequest(BaseModel):
+    token: str
+    device: Optional[str] = Field(None, max_length=100)
+
+
+class CheckInResponse(BaseModel):
+    status: str
+    user_id: int
+    name: str
+    organization: str
+    checked_in_at: datetime
+
+
+class OfflineScan(BaseModel):
+    token: str
+    scanned_at: datetime
+
+    @validator('scanned_at')
+    def scanned_at_naive_utc(cls, v):
+        # Check-in times are stored as naive UTC, like datetime.utcnow()
+        if v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+
+class CheckInSyncRequest(BaseModel):
+    device: Optional[str] = Field(None, max_length=100)
+    scans: List[OfflineScan] = Field(..., max_length=settings.CHECKIN_SYNC_MAX_SCANS)
+
+
+class SyncResult(BaseModel):
+    token: str
+    status: str
+    user_id: Optional[int] = None
+
+
+class CheckInSyncResponse(BaseModel):
+    checked_in: int
+    already_checked_in: int
+    invalid: int
+    results: List[SyncResult]
+
+
+class CheckInStats(BaseModel):
+    participants: int
+    checked_in: int
+    pending_writes: int
@@ -0,0 +1,24 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class StatCount(BaseModel):
+    value: str
+    count: int
+
+
+class DimensionStats(BaseModel):
+    # The most common values, largest first; the rest are summed in ``other``
+    top: List[StatCount]
+    other: int = 0
+    distinct: int
+
+
+class ParticipantStats(BaseModel):
+    total: int
+    genders: List[StatCount]
+    age_brackets: List[StatCount]
+    nationalities: DimensionStats
+    organizations: DimensionStats
+    updated_at: Optional[datetime] = None
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date
 from pydantic import BaseModel, EmailStr, validator, Field
 from app.models.user import GenderEnum
@@ -50,10 +50,46 @@ class UserUpdate(BaseModel):
 
 class UserInDB(UserBase):
     id: int
+    avatar: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
 class UserResponse(UserInDB):
-    pass
\ No newline at end of file
+    pass
+
+
+class UserFilter(BaseModel):
+    organization: Optional[str] = None
+    nationality: Optional[str] = None
+    gender: Optional[GenderEnum] = None
+    position: Optional[str] = None
+    name: Optional[str] = Field(None, description="Prefix of the first or last name")
+    
+    @validator('*', pre=True)
+    def empty_to_none(cls, v):
+        if isinstance(v, str) and not v.strip():
+            return None
+        return v
+
+
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    total: int
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    errors: Dict[str, str]
+
+
+class ImportReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    errors: List[ImportRowError]
@@ -0,0 +1,111 @@
+"""Production launcher: several uvicorn workers behind one listening socket.
+
+Usage:
+    python -m app.cli serve [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+On SIGTERM/SIGINT each worker stops accepting connections, waits up to
+SERVER_GRACEFUL_TIMEOUT seconds for in-flight requests, then runs the
+app's shutdown (mail queue flush, metrics snapshot removal, engine dispose).
+"""
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, List
+
+import uvicorn
+
+from app.config import settings
+from app.core.assets import asset_manifest
+from app.core.database import engine, init_db
+
+logger = logging.getLogger(__name__)
+
+# Set for the workers once the launcher has created the schema and built the assets
+PREPARED_ENV = "CONFERENCE_SERVER_PREPARED"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(workers: int, host: str, port: int) -> Dict[str, Any]:
+    return {
+        "host": host,
+        "port": port,
+        "workers": workers,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY or None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        # app.core.logging owns the handlers and RequestLoggingMiddleware
+        # writes the access records
+        "log_config": None,
+        "access_log": False,
+        "server_header": False,
+    }
+
+
+def check_worker_state(workers: int) -> List[str]:
+    """Warnings about state that each worker keeps to itself.
+
+    Raises RuntimeError for settings that would break with several workers.
+    """
+    if workers <= 1:
+        return []
+    if settings.RESET_CODE_BACKEND == "memory":
+        raise RuntimeError(
+            'RESET_CODE_BACKEND="memory" only verifies codes on the worker that issued them; '
+            'use "database" or a single worker'
+        )
+
+    warnings = [
+        f"Login rate limits are counted per worker; a client may get up to {workers}x "
+        f"LOGIN_RATE_LIMIT attempts per window"
+    ]
+    if not settings.USER_CACHE_URL:
+        warnings.append(
+            "USER_CACHE_URL is not set; other workers may keep serving a changed user "
+            f"for up to {settings.USER_CACHE_TTL}s"
+        )
+    if settings.ADMISSION_ENABLED:
+        warnings.append(
+            f"Admission control is per worker: up to {workers * settings.ADMISSION_MAX_ACTIVE} bcrypt "
+            f"requests run at once in total; lower ADMISSION_MAX_ACTIVE to match the CPUs"
+        )
+    warnings.append(
+        "Badge check-ins are tracked per worker; a badge scanned on two workers is reported as "
+        "checked in on both, though it is stored once"
+    )
+    if settings.METRICS_ENABLED and not settings.METRICS_DIR:
+        warnings.append("METRICS_DIR is not set; /metrics only reports the worker that answers the scrape")
+    return warnings
+
+
+def serve(workers: int = None, host: str = None, port: int = None) -> int:
+    workers = workers or settings.SERVER_WORKERS
+    try:
+        warnings = check_worker_state(workers)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 2
+    for warning in warnings:
+        logger.warning(warning)
+
+    # Create the schema and build the assets once, before the workers
+    # import the app at the same time
+    init_db()
+    engine.dispose()
+    asset_manifest.build()
+    os.environ[PREPARED_ENV] = "1"
+
+    options = server_options(workers, host or settings.SERVER_HOST, port or settings.SERVER_PORT)
+    logger.info(
+        f"Starting {workers} worker(s) on {options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']})"
+    )
+    uvicorn.run("app.main:app", **options)
+    return 0
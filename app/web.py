@@ -1,26 +1,34 @@
 from datetime import datetime
 from typing import Dict, List, Optional
+from urllib.parse import urlencode
+import logging
 import secrets
+import time
 
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import EmailStr
 
-from app.core.database import get_db
-from app.core.security import get_current_user, create_access_token, set_csrf_token, verify_csrf_token, get_password_hash
+from app.core.admission import admission
+from app.core.database import get_async_db, get_async_read_db
+from app.core.security import get_current_user, create_access_token, is_organizer, set_csrf_token, verify_csrf_token
 from app.core.rate_limit import check_login_rate_limit
 from app.core.validation import validate_password, validate_gender, validate_birth_date
-from app.core.logging import logger
+from app.core.templates import templates
+from app.core.avatars import avatar_store
+from app.core.conditional import make_etag, is_not_modified, not_modified, set_validators
 from app.core.email import send_password_reset_email, verify_reset_code
-from app.crud.user import create_user, get_users, update_user, authenticate_user, get_user_by_email
+from app.core.stats import participant_stats
+from app.crud.agenda import get_sessions, get_reserved_session_ids, reserve_seat, cancel_reservation
+from app.crud.user import SORT_COLUMNS, create_user, get_users, update_user, authenticate_user, get_user_by_email, count_users, reset_user_password, update_user_avatar
+from app.crud.change_version import get_users_version
 from app.models.user import User, GenderEnum
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserUpdate, UserFilter
 from app.config import settings
 
-templates = Jinja2Templates(directory="app/templates")
+logger = logging.getLogger(__name__)
 
 router = APIRouter(include_in_schema=False)
 
@@ -39,25 +47,45 @@ class FlashMessage:
 
 async def get_current_user_from_cookie(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> Optional[User]:
     token = request.cookies.get("access_token")
     if not token:
         return None
     
     try:
-        user = get_current_user(db=db, token=token)
+        user = await get_current_user(db=db, token=token)
         return user
     except HTTPException:
         return None
 
 
+async def get_user_filter_from_query(
+    organization: Optional[str] = None,
+    nationality: Optional[str] = None,
+    gender: Optional[str] = None,
+    position: Optional[str] = None,
+    name: Optional[str] = None
+) -> UserFilter:
+    # The filter form submits empty strings for unused fields
+    if gender not in {item.value for item in GenderEnum}:
+        gender = None
+    
+    return UserFilter(
+        organization=organization,
+        nationality=nationality,
+        gender=gender,
+        position=position,
+        name=name
+    )
+
+
 @router.get("/", response_class=HTMLResponse)
 async def index(
     request: Request,
     user: Optional[User] = Depends(get_current_user_from_cookie)
 ):
-    logger.info(f"Index page accessed by user ID: {user.id if user else 'anonymous'}")
+    logger.info("Index page accessed", extra={"user_id": user.id if user else None, "sample": "page_view"})
     return templates.TemplateResponse(
         "index.html",
         {"request": request, "user": user}
@@ -75,14 +103,21 @@ async def register_page(
     csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
         "register.html",
-        {"request": request, "user": user, "errors": {}, "form_data": None, "csrf_token": csrf_token}
+        {
+            "request": request,
+            "user": user,
+            "errors": {},
+            "form_data": None,
+            "csrf_token": csrf_token,
+            "messages": request.session.pop("messages", [])
+        }
     )
 
 
 @router.post("/register", response_class=HTMLResponse)
 async def register_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     csrf_token: str = Form(...),
     first_name: str = Form(...),
     last_name: str = Form(...),
@@ -109,10 +144,12 @@ async def register_user(
     }
     
     errors = {}
+    status_code = status.HTTP_400_BAD_REQUEST
+    headers = None
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during registration attempt for email: {email}")
+        logger.warning("CSRF validation failed", extra={"action": "register", "email": email})
     
     password_errors = validate_password(password, password_confirm)
     errors.update(password_errors)
@@ -141,8 +178,8 @@ async def register_user(
                 password_confirm=password_confirm
             )
             
-            user = create_user(db, user_data)
-            logger.info(f"New user registered: {user.email} (ID: {user.id})")
+            user = await create_user(db, user_data)
+            logger.info("New user registered", extra={"user_id": user.id, "email": user.email})
             
             access_token = create_access_token(subject=user.id)
             response = RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
@@ -157,8 +194,13 @@ async def register_user(
             return response
             
         except HTTPException as e:
-            errors["email"] = e.detail
-            logger.warning(f"Registration failed for email {email}: {e.detail}")
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                errors["form"] = e.detail
+                status_code = e.status_code
+                headers = e.headers
+            else:
+                errors["email"] = e.detail
+            logger.warning("Registration failed", extra={"email": email, "reason": e.detail})
     
     new_csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
@@ -170,7 +212,41 @@ async def register_user(
             "form_data": form_data,
             "csrf_token": new_csrf_token
         },
-        status_code=status.HTTP_400_BAD_REQUEST
+        status_code=status_code,
+        headers=headers
+    )
+
+
+@router.get("/waiting", response_class=HTMLResponse)
+async def waiting_room(request: Request, ticket: str = ""):
+    # Polled by everyone in the queue, so no session or database work here
+    loaded = admission.load_ticket(ticket)
+    if loaded is None:
+        # Missing, forged or expired ticket: go back and queue again if needed
+        return RedirectResponse(url="/register", status_code=status.HTTP_303_SEE_OTHER)
+
+    issued_at, next_path = loaded
+    position = admission.position(issued_at)
+    if not position:
+        logger.info("Admitted from waiting room", extra={
+            "waited_s": round(max(time.time() - issued_at, 0), 1),
+            "sample": "admission",
+        })
+        response = RedirectResponse(url=next_path, status_code=status.HTTP_303_SEE_OTHER)
+        response.headers.append("set-cookie", admission.issue_pass())
+        return response
+
+    estimated_wait = admission.estimated_wait(position)
+    return templates.TemplateResponse(
+        "waiting.html",
+        {
+            "request": request,
+            "position": position,
+            "estimated_wait": estimated_wait,
+            # Poll less often from the back of the queue
+            "refresh": min(max(2, (estimated_wait or 10) // 4), 15),
+        },
+        headers={"Cache-Control": "no-store"},
     )
 
 
@@ -185,7 +261,13 @@ async def login_page(
     csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
         "login.html",
-        {"request": request, "user": None, "errors": {}, "csrf_token": csrf_token}
+        {
+            "request": request,
+            "user": None,
+            "errors": {},
+            "csrf_token": csrf_token,
+            "messages": request.session.pop("messages", [])
+        }
     )
 
 
@@ -194,7 +276,7 @@ async def login_user(
     request: Request,
     csrf_token: str = Form(...),
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     errors = {}
     
@@ -216,7 +298,7 @@ async def login_user(
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during login attempt for email: {form_data.username}")
+        logger.warning("CSRF validation failed", extra={"action": "login", "email": form_data.username})
         new_csrf_token = set_csrf_token(request)
         return templates.TemplateResponse(
             "login.html",
@@ -229,9 +311,24 @@ async def login_user(
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    user = authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except HTTPException as e:
+        new_csrf_token = set_csrf_token(request)
+        return templates.TemplateResponse(
+            "login.html",
+            {
+                "request": request,
+                "user": None,
+                "errors": {"form": e.detail},
+                "csrf_token": new_csrf_token
+            },
+            status_code=e.status_code,
+            headers=e.headers
+        )
+    
     if not user:
-        logger.warning(f"Failed login attempt for email: {form_data.username}")
+        logger.warning("Failed login attempt", extra={"email": form_data.username})
         new_csrf_token = set_csrf_token(request)
         return templates.TemplateResponse(
             "login.html",
@@ -244,7 +341,7 @@ async def login_user(
             status_code=status.HTTP_401_UNAUTHORIZED
         )
     
-    logger.info(f"User logged in: {user.email} (ID: {user.id})")
+    logger.info("User logged in", extra={"user_id": user.id, "email": user.email})
     access_token = create_access_token(subject=user.id)
     response = RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
     response.set_cookie(
@@ -261,7 +358,7 @@ async def login_user(
 @router.get("/logout", response_class=HTMLResponse)
 async def logout(request: Request, user: Optional[User] = Depends(get_current_user_from_cookie)):
     if user:
-        logger.info(f"User logged out: {user.email} (ID: {user.id})")
+        logger.info("User logged out", extra={"user_id": user.id, "email": user.email})
     
     response = RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie(key="access_token")
@@ -271,25 +368,96 @@ async def logout(request: Request, user: Optional[User] = Depends(get_current_us
 @router.get("/users", response_class=HTMLResponse)
 async def users_page(
     request: Request,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    filters: UserFilter = Depends(get_user_filter_from_query),
+    db: AsyncSession = Depends(get_async_read_db),
     user: User = Depends(get_current_user_from_cookie)
 ):
     if not user:
         return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
     
-    users = get_users(db)
-    logger.info(f"Users list accessed by: {user.email} (ID: {user.id})")
+    # The page depends on the data, the viewer ("You" badge) and the query
+    version, changed_at = await get_users_version(db)
+    etag = make_etag("users-page", version, user.id, request.url.query)
+    if is_not_modified(request, etag, changed_at):
+        return not_modified(etag, changed_at)
+    
+    if sort not in SORT_COLUMNS:
+        sort = "id"
+    if order not in ("asc", "desc"):
+        order = "asc"
+    
+    page = await get_users(
+        db,
+        limit=settings.USERS_PAGE_SIZE,
+        cursor=cursor,
+        sort=sort,
+        descending=order == "desc",
+        filters=filters
+    )
+    total = await count_users(db, filters)
     
-    return templates.TemplateResponse(
+    # Carried over to the pagination links so paging keeps the current view
+    query_params = {key: value for key, value in filters.model_dump(mode="json").items() if value}
+    query_params.update(sort=sort, order=order)
+    logger.info("Users list accessed", extra={"user_id": user.id, "sample": "page_view"})
+    
+    response = templates.TemplateResponse(
         "users.html",
-        {"request": request, "user": user, "users": users, "current_user": user}
+        {
+            "request": request,
+            "user": user,
+            "users": page.items,
+            "total": total,
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+            "filters": filters,
+            "sort": sort,
+            "order": order,
+            "sort_columns": list(SORT_COLUMNS),
+            "genders": list(GenderEnum),
+            "query_string": urlencode(query_params),
+            "cursor": cursor or "",
+            "users_version": version,
+            "current_user": user
+        }
+    )
+    set_validators(response, etag, changed_at)
+    return response
+
+
+@router.get("/stats", response_class=HTMLResponse)
+async def stats_page(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_from_cookie)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+    if not is_organizer(user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    
+    stats, version = await participant_stats.get(db)
+    # The navbar shows the viewer, and ages move on with the date
+    etag = make_etag("stats-page", version, participant_stats.key[1], user.id)
+    if is_not_modified(request, etag, stats.updated_at):
+        return not_modified(etag, stats.updated_at)
+    
+    logger.info("Statistics accessed", extra={"user_id": user.id, "sample": "page_view"})
+    response = templates.TemplateResponse(
+        "stats.html",
+        {"request": request, "user": user, "stats": stats}
     )
+    set_validators(response, etag, stats.updated_at)
+    return response
 
 
 @router.get("/profile", response_class=HTMLResponse)
 async def profile_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user: User = Depends(get_current_user_from_cookie)
 ):
     if not user:
@@ -305,7 +473,7 @@ async def profile_page(
 @router.post("/profile", response_class=HTMLResponse)
 async def update_profile(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user_from_cookie),
     csrf_token: str = Form(...),
     first_name: str = Form(...),
@@ -338,10 +506,12 @@ async def update_profile(
         form_data["password_confirm"] = password_confirm
     
     errors = {}
+    status_code = status.HTTP_400_BAD_REQUEST
+    headers = None
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during profile update for user: {user.email} (ID: {user.id})")
+        logger.warning("CSRF validation failed", extra={"action": "profile", "user_id": user.id})
     
     if password:
         password_errors = validate_password(password, password_confirm)
@@ -373,18 +543,20 @@ async def update_profile(
                 user_update.password = password
                 user_update.password_confirm = password_confirm
             
-            updated_user = update_user(db, user.id, user_update)
+            updated_user = await update_user(db, user.id, user_update)
             if not updated_user:
                 errors["form"] = "Failed to update profile"
-                logger.error(f"Failed to update profile for user: {user.email} (ID: {user.id})")
+                logger.error("Failed to update profile", extra={"user_id": user.id})
             else:
-                logger.info(f"Profile updated for user: {user.email} (ID: {user.id})")
+                logger.info("Profile updated", extra={"user_id": user.id})
                 response = RedirectResponse(url="/users", status_code=status.HTTP_303_SEE_OTHER)
                 return response
             
         except HTTPException as e:
             errors["form"] = e.detail
-            logger.warning(f"Profile update failed for user {user.email} (ID: {user.id}): {e.detail}")
+            status_code = e.status_code
+            headers = e.headers
+            logger.warning("Profile update failed", extra={"user_id": user.id, "reason": e.detail})
     
     new_csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
@@ -396,10 +568,151 @@ async def update_profile(
             "form_data": form_data,
             "csrf_token": new_csrf_token
         },
-        status_code=status.HTTP_400_BAD_REQUEST
+        status_code=status_code,
+        headers=headers
     )
 
 
+@router.post("/profile/avatar", response_class=HTMLResponse)
+async def upload_avatar(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_from_cookie),
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+    
+    errors = {}
+    status_code = status.HTTP_400_BAD_REQUEST
+    
+    # The body is streamed to disk by the store instead of going through Form()/UploadFile
+    try:
+        fields, digest, tmp_path = await avatar_store.receive(request)
+    except HTTPException as e:
+        fields, digest, tmp_path = {}, None, None
+        errors["avatar"] = e.detail
+        status_code = e.status_code
+    
+    if tmp_path is not None:
+        if not verify_csrf_token(request, fields.get("csrf_token", "")):
+            errors["csrf"] = "Invalid security token. Please try again."
+            logger.warning("CSRF validation failed", extra={"action": "avatar", "user_id": user.id})
+        elif digest is None:
+            errors["avatar"] = "Please choose an image to upload"
+        
+        if errors:
+            avatar_store.discard(tmp_path)
+        else:
+            try:
+                created = await avatar_store.store(digest, tmp_path)
+                await update_user_avatar(db, user.id, digest)
+                logger.info("Avatar updated", extra={"user_id": user.id, "avatar": digest, "deduplicated": not created})
+                return RedirectResponse(url="/profile", status_code=status.HTTP_303_SEE_OTHER)
+            except HTTPException as e:
+                errors["avatar"] = e.detail
+                status_code = e.status_code
+                logger.warning("Avatar upload failed", extra={"user_id": user.id, "reason": e.detail})
+    
+    new_csrf_token = set_csrf_token(request)
+    return templates.TemplateResponse(
+        "profile.html",
+        {
+            "request": request,
+            "user": user,
+            "errors": errors,
+            "csrf_token": new_csrf_token
+        },
+        status_code=status_code
+    )
+
+
+@router.get("/agenda", response_class=HTMLResponse)
+async def agenda_page(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User = Depends(get_current_user_from_cookie)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+    
+    sessions = await get_sessions(db)
+    reserved = await get_reserved_session_ids(db, user.id)
+    logger.info("Agenda accessed", extra={"user_id": user.id, "sample": "page_view"})
+    
+    csrf_token = set_csrf_token(request)
+    return templates.TemplateResponse(
+        "agenda.html",
+        {
+            "request": request,
+            "user": user,
+            "sessions": sessions,
+            "reserved": reserved,
+            "now": datetime.utcnow(),
+            "messages": request.session.pop("messages", []),
+            "csrf_token": csrf_token
+        }
+    )
+
+
+@router.post("/agenda/{session_id}/reserve", response_class=HTMLResponse)
+async def reserve_agenda_seat(
+    request: Request,
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_from_cookie),
+    csrf_token: str = Form(...)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+    
+    flash = FlashMessage(request)
+    if not verify_csrf_token(request, csrf_token):
+        flash.add("Invalid security token. Please try again.", "danger")
+        logger.warning("CSRF validation failed", extra={"action": "reserve", "user_id": user.id})
+    else:
+        try:
+            _, seats_left = await reserve_seat(db, session_id, user.id)
+            flash.add("Your seat is reserved.", "success")
+            logger.info("Seat reserved", extra={"user_id": user.id, "session_id": session_id, "seats_left": seats_left})
+        except HTTPException as e:
+            flash.add(e.detail, "warning")
+            logger.info("Seat not reserved", extra={
+                "user_id": user.id, "session_id": session_id, "reason": e.detail, "sample": "reservation_rejected"
+            })
+    
+    request.session["messages"] = flash.get()
+    return RedirectResponse(url="/agenda", status_code=status.HTTP_303_SEE_OTHER)
+
+
+@router.post("/agenda/{session_id}/cancel", response_class=HTMLResponse)
+async def cancel_agenda_seat(
+    request: Request,
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_from_cookie),
+    csrf_token: str = Form(...)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+    
+    flash = FlashMessage(request)
+    if not verify_csrf_token(request, csrf_token):
+        flash.add("Invalid security token. Please try again.", "danger")
+        logger.warning("CSRF validation failed", extra={"action": "cancel_reservation", "user_id": user.id})
+    else:
+        try:
+            if await cancel_reservation(db, session_id, user.id):
+                flash.add("Your reservation has been cancelled.", "info")
+                logger.info("Reservation cancelled", extra={"user_id": user.id, "session_id": session_id})
+            else:
+                flash.add("You have no seat in this session.", "warning")
+        except HTTPException as e:
+            flash.add(e.detail, "warning")
+    
+    request.session["messages"] = flash.get()
+    return RedirectResponse(url="/agenda", status_code=status.HTTP_303_SEE_OTHER)
+
+
 @router.get("/forgot-password", response_class=HTMLResponse)
 async def forgot_password_page(
     request: Request,
@@ -411,7 +724,13 @@ async def forgot_password_page(
     csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
         "forgot_password.html",
-        {"request": request, "user": None, "errors": {}, "csrf_token": csrf_token}
+        {
+            "request": request,
+            "user": None,
+            "errors": {},
+            "csrf_token": csrf_token,
+            "messages": request.session.pop("messages", [])
+        }
     )
 
 
@@ -420,29 +739,29 @@ async def forgot_password_submit(
     request: Request,
     email: EmailStr = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     errors = {}
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during password reset attempt for email: {email}")
+        logger.warning("CSRF validation failed", extra={"action": "forgot_password", "email": email})
     
     if not errors:
         # Check if user exists
-        user = get_user_by_email(db, email)
+        user = await get_user_by_email(db, email)
         if not user:
             errors["email"] = "No account found with this email address"
         else:
             # Send password reset email
-            if send_password_reset_email(email):
-                logger.info(f"Password reset email sent to: {email}")
+            if await send_password_reset_email(email):
+                logger.info("Password reset email sent", extra={"email": email})
                 # Redirect to verification page
                 response = RedirectResponse(url=f"/verify-reset-code?email={email}", status_code=status.HTTP_303_SEE_OTHER)
                 return response
             else:
                 errors["email"] = "Failed to send reset email. Please check your email configuration or try again later."
-                logger.error(f"Failed to send password reset email to: {email}")
+                logger.error("Failed to send password reset email", extra={"email": email})
     
     new_csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
@@ -479,24 +798,24 @@ async def verify_code_submit(
     email: str = Form(...),
     code: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     errors = {}
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during code verification for email: {email}")
+        logger.warning("CSRF validation failed", extra={"action": "verify_reset_code", "email": email})
     
     if not errors:
         # Verify the reset code
-        if verify_reset_code(email, code):
-            logger.info(f"Password reset code verified for: {email}")
+        if await verify_reset_code(email, code):
+            logger.info("Password reset code verified", extra={"email": email})
             # Redirect to reset password page
             response = RedirectResponse(url=f"/reset-password?email={email}", status_code=status.HTTP_303_SEE_OTHER)
             return response
         else:
             errors["code"] = "Invalid or expired verification code. Please request a new code or check your email again."
-            logger.warning(f"Invalid password reset code attempt for: {email}")
+            logger.warning("Invalid password reset code attempt", extra={"email": email})
     
     new_csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
@@ -524,7 +843,14 @@ async def reset_password_page(
     csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
         "reset_password.html",
-        {"request": request, "user": None, "email": email, "errors": {}, "csrf_token": csrf_token}
+        {
+            "request": request,
+            "user": None,
+            "email": email,
+            "errors": {},
+            "csrf_token": csrf_token,
+            "messages": request.session.pop("messages", [])
+        }
     )
 
 
@@ -535,36 +861,43 @@ async def reset_password_submit(
     password: str = Form(...),
     password_confirm: str = Form(...),
     csrf_token: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     errors = {}
+    status_code = status.HTTP_400_BAD_REQUEST
+    headers = None
     
     if not verify_csrf_token(request, csrf_token):
         errors["csrf"] = "Invalid security token. Please try again."
-        logger.warning(f"CSRF validation failed during password reset for email: {email}")
+        logger.warning("CSRF validation failed", extra={"action": "reset_password", "email": email})
     
     password_errors = validate_password(password, password_confirm)
     errors.update(password_errors)
     
     if not errors:
         # Update user's password
-        user = get_user_by_email(db, email)
+        user = await get_user_by_email(db, email)
         if not user:
             errors["email"] = "User not found"
         else:
             # Update password
-            user.hashed_password = get_password_hash(password)
-            db.commit()
-            logger.info(f"Password reset successful for user: {email}")
-            
-            # Create flash message
-            flash = FlashMessage(request)
-            flash.add("Your password has been reset successfully. Please login with your new password.", "success")
-            request.session["messages"] = flash.get()
-            
-            # Redirect to login page
-            response = RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
-            return response
+            try:
+                await reset_user_password(db, user, password)
+            except HTTPException as e:
+                errors["form"] = e.detail
+                status_code = e.status_code
+                headers = e.headers
+            else:
+                logger.info("Password reset successful", extra={"email": email})
+                
+                # Create flash message
+                flash = FlashMessage(request)
+                flash.add("Your password has been reset successfully. Please login with your new password.", "success")
+                request.session["messages"] = flash.get()
+                
+                # Redirect to login page
+                response = RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
+                return response
     
     new_csrf_token = set_csrf_token(request)
     return templates.TemplateResponse(
@@ -576,5 +909,6 @@ async def reset_password_submit(
             "errors": errors,
             "csrf_token": new_csrf_token
         },
-        status_code=status.HTTP_400_BAD_REQUEST if errors else status.HTTP_200_OK
+        status_code=status_code if errors else status.HTTP_200_OK,
+        headers=headers
     ) 
\ No newline at end of file
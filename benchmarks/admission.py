@@ -0,0 +1,149 @@
+"""Overload test for admission control on the registration flow.
+
+--visitors browsers arrive at the same moment, like when registration
+opens, and each one registers: GET /register, then POST /register. Visitors
+sent to the waiting room poll it every --poll seconds until admitted.
+Visitors whose post the gate refuses are sent back to the form and submit
+it again; those told the server is busy (503) retry after Retry-After,
+like a person clicking again. Runs the ASGI app in-process against a fresh SQLite
+database.
+
+Reports goodput (registrations completed per second), time from arrival to
+registration, and how many 503s and waiting-room polls it took. Run it
+with and without --no-admission to compare.
+
+Usage:
+    python -m benchmarks.admission [--visitors 200] [--poll 0.5] [--no-admission]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+PASSWORD = "Bench-mark1!"
+
+
+async def _form_page(client, url: str, poll: float, outcomes: Counter):
+    """Follow redirects to the registration form, polling the waiting room on the way"""
+    while True:
+        response = await client.get(url)
+        if response.status_code == 303:
+            url = response.headers["location"]
+        elif response.status_code == 200 and url.startswith("/waiting"):
+            outcomes["waiting_room_polls"] += 1
+            await asyncio.sleep(poll)
+        else:
+            return response
+
+
+async def visitor(make_client, i: int, poll: float, deadline: float, outcomes: Counter) -> float:
+    from benchmarks.load import CSRF_PATTERN
+
+    started = time.perf_counter()
+    url = "/register"
+    async with make_client() as client:
+        while time.perf_counter() < deadline:
+            response = await _form_page(client, url, poll, outcomes)
+            url = "/register"
+            if response.status_code != 200:
+                outcomes[f"get_{response.status_code}"] += 1
+                await asyncio.sleep(1)
+                continue
+
+            token = CSRF_PATTERN.search(response.text).group(1)
+            response = await client.post("/register", data={
+                "csrf_token": token,
+                "first_name": "Rush",
+                "last_name": f"Visitor{i}",
+                "gender": "other",
+                "nationality": "Benchland",
+                "organization": "Load Test",
+                "position": "Tester",
+                "birth_date": "1990-01-01",
+                "email": f"rush{i}@bench.example.com",
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            })
+            if response.status_code == 303:
+                location = response.headers["location"]
+                if not location.startswith("/register"):
+                    return time.perf_counter() - started
+                # Refused by the gate: back to the form
+                outcomes["post_refused"] += 1
+                url = location
+                continue
+            if "already registered" in response.text:
+                # An earlier attempt got through after all
+                return time.perf_counter() - started
+            outcomes[f"post_{response.status_code}"] += 1
+            await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+
+    outcomes["gave_up"] += 1
+    return -1.0
+
+
+async def run(args) -> int:
+    import httpx
+
+    from app.core.database import dispose_engines
+    from app.main import app
+    from benchmarks.load import percentile
+
+    # Server errors come back as 500 responses, as they would over the network
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    def make_client():
+        return httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=120, headers={"Accept": "text/html"}
+        )
+
+    outcomes: Counter = Counter()
+    lifespan = app.router.lifespan_context(app)
+    await lifespan.__aenter__()
+    try:
+        started = time.perf_counter()
+        deadline = started + args.timeout
+        durations: List[float] = await asyncio.gather(*(
+            visitor(make_client, i, args.poll, deadline, outcomes) for i in range(args.visitors)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await lifespan.__aexit__(None, None, None)
+        await dispose_engines()
+
+    done = sorted(d * 1000 for d in durations if d >= 0)
+    print(f"Admission control {'off' if args.no_admission else 'on'}: {args.visitors} visitors at once")
+    print(
+        f"Registered {len(done)}/{args.visitors} in {elapsed:.1f}s ({len(done) / elapsed:.2f}/s), "
+        f"time to register p50 {percentile(done, 50) / 1000:.1f}s, p95 {percentile(done, 95) / 1000:.1f}s, "
+        f"max {(done[-1] if done else 0) / 1000:.1f}s"
+    )
+    print("Along the way: " + (", ".join(f"{key} {value}" for key, value in sorted(outcomes.items())) or "nothing"))
+    return 0 if len(done) == args.visitors else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.admission")
+    parser.add_argument("--db", type=Path, default=Path(".cache/admission.db"), help="SQLite database (recreated)")
+    parser.add_argument("--visitors", type=int, default=200)
+    parser.add_argument("--poll", type=float, default=0.5, help="Seconds between waiting-room polls")
+    parser.add_argument("--timeout", type=float, default=300, help="Visitors give up after this many seconds")
+    parser.add_argument("--no-admission", action="store_true", help="Run with ADMISSION_ENABLED=false")
+    args = parser.parse_args(argv)
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{args.db}{suffix}").unlink(missing_ok=True)
+    # The app reads its settings at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ["ADMISSION_ENABLED"] = "false" if args.no_admission else "true"
+    os.environ.setdefault("LOG_LEVELS", "app=WARNING,httpx=WARNING")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
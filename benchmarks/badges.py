@@ -0,0 +1,127 @@
+"""Throughput test for printing badges, with an interruption half way.
+
+Seeds --participants into a fresh SQLite database and prints their badges
+with app.core.badge_print on --workers processes. The first run is stopped
+once about half of the badges are printed, as if the job was killed; the
+second run resumes it. Afterwards the manifest must list every participant
+exactly once, in id order, and every sheet must exist; any mismatch exits
+non-zero.
+
+Reports badges per second for each run and the size of the output.
+
+Usage:
+    python -m benchmarks.badges [--participants 20000] [--workers 4] [--sheet-size 96]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+
+class _Stop(Exception):
+    pass
+
+
+async def _seed(participants: int) -> None:
+    from app.core.database import AsyncSessionLocal, init_db
+    from app.crud.user import insert_users
+    from app.models.user import GenderEnum
+
+    init_db()
+    async with AsyncSessionLocal() as db:
+        for start in range(0, participants, 1000):
+            await insert_users(db, [
+                {
+                    "first_name": f"First{n}",
+                    "last_name": f"Last{n}" if n % 17 else "Vandenberghe-Ostrowska-Featherstonehaugh",
+                    "gender": GenderEnum.OTHER,
+                    "nationality": "Benchland",
+                    "organization": f"Organization {n % 50}",
+                    "position": "Tester",
+                    "birth_date": date(1990, 1, 1),
+                    "email": f"badge{n}@bench.example.com",
+                    "hashed_password": "x",
+                }
+                for n in range(start, min(start + 1000, participants))
+            ])
+
+
+async def run(args) -> int:
+    from app.core.badge_print import BadgePrintJob
+    from app.core.database import dispose_engines
+
+    try:
+        await _seed(args.participants)
+
+        def make_job() -> BadgePrintJob:
+            job = BadgePrintJob(args.out, workers=args.workers, badges_per_sheet=args.sheet_size)
+            job.load()
+            return job
+
+        def stop_half_way(done: int, total: int) -> None:
+            if done >= total // 2:
+                raise _Stop()
+
+        started = time.perf_counter()
+        first = make_job()
+        try:
+            await first.run(stop_half_way)
+        except _Stop:
+            pass
+        first_elapsed = time.perf_counter() - started
+        first_printed = first.manifest["badges"]
+
+        started = time.perf_counter()
+        second = make_job()
+        printed = await second.run()
+        second_elapsed = time.perf_counter() - started
+    finally:
+        await dispose_engines()
+
+    manifest = second.manifest
+    expected_id = 1
+    problems = []
+    for sheet in manifest["sheets"]:
+        if sheet["first_user_id"] != expected_id:
+            problems.append(f"{sheet['file']} starts at {sheet['first_user_id']}, expected {expected_id}")
+        if not (args.out / sheet["file"]).exists():
+            problems.append(f"{sheet['file']} is missing")
+        expected_id = sheet["last_user_id"] + 1
+    if manifest["badges"] != args.participants or expected_id != args.participants + 1:
+        problems.append(f"{manifest['badges']} badges printed for {args.participants} participants")
+
+    size = sum(path.stat().st_size for path in args.out.glob("*.pdf"))
+    print(f"{args.participants} badges, {args.workers} workers, {args.sheet_size} per sheet")
+    print(f"First run: {first_printed} badges in {first_elapsed:.1f}s ({first_printed / first_elapsed:.0f}/s), stopped")
+    print(f"Resumed: {printed} badges in {second_elapsed:.1f}s ({printed / second_elapsed:.0f}/s)")
+    print(f"{len(manifest['sheets'])} sheets, {size / 2 ** 20:.1f} MB ({size / args.participants / 1024:.1f} KB per badge)")
+    for problem in problems:
+        print(f"  MISMATCH: {problem}")
+    return 1 if problems else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.badges")
+    parser.add_argument("--db", type=Path, default=Path(".cache/badges.db"), help="SQLite database (recreated)")
+    parser.add_argument("--out", type=Path, default=Path(".cache/badges"), help="Output directory (recreated)")
+    parser.add_argument("--participants", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--sheet-size", type=int, default=96, help="Badges per sheet PDF")
+    args = parser.parse_args(argv)
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{args.db}{suffix}").unlink(missing_ok=True)
+    shutil.rmtree(args.out, ignore_errors=True)
+    # The app reads its settings at import time; spawned render workers read them too
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("LOG_LEVELS", "app=WARNING")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""Load test for the registration, login and listing flows.
+
+Drives the real ASGI app in-process (default) or a local uvicorn server
+started by the harness, against a seeded SQLite database, and reports
+throughput and p50/p95/p99 latency per scenario. Results can be saved as
+JSON and compared with an earlier run.
+
+Usage:
+    python -m benchmarks.load [--mode inprocess|uvicorn] [--seed-users 10000]
+        [--requests 200] [--concurrency 10] [--scenarios register,login,...]
+        [--output results.json] [--compare baseline.json]
+
+Each iteration of a scenario is one user-visible flow:
+    register   GET /register for the CSRF token, then POST /register
+    login      GET /login for the CSRF token, then POST /login
+    users      GET /users as a logged-in user
+    api_login  POST /api/v1/auth/login
+    api_users  GET /api/v1/users/ with a bearer token
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+SEED_PASSWORD = "Bench-mark1!"
+SEED_EMAIL = "seed{}@bench.example.com"
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+SCENARIOS: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+class UnexpectedResponse(Exception):
+    pass
+
+
+def _expect(response, *statuses: int) -> None:
+    if response.status_code not in statuses:
+        raise UnexpectedResponse(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+
+
+async def _csrf_token(client, path: str) -> str:
+    response = await client.get(path)
+    _expect(response, 200)
+    match = CSRF_PATTERN.search(response.text)
+    if not match:
+        raise UnexpectedResponse(f"No CSRF token on {path}")
+    return match.group(1)
+
+
+@scenario
+async def register(client, ctx: Dict[str, Any], i: int) -> None:
+    client.cookies.clear()
+    token = await _csrf_token(client, "/register")
+    response = await client.post("/register", data={
+        "csrf_token": token,
+        "first_name": "Bench",
+        "last_name": f"User{i}",
+        "gender": "other",
+        "nationality": "Benchland",
+        "organization": "Load Test",
+        "position": "Tester",
+        "birth_date": "1990-01-01",
+        "email": f"register-{ctx['run_id']}-{i}@bench.example.com",
+        "password": SEED_PASSWORD,
+        "password_confirm": SEED_PASSWORD,
+    })
+    _expect(response, 303)
+
+
+@scenario
+async def login(client, ctx: Dict[str, Any], i: int) -> None:
+    client.cookies.clear()
+    token = await _csrf_token(client, "/login")
+    response = await client.post("/login", data={
+        "csrf_token": token,
+        "username": SEED_EMAIL.format(i % ctx["seed_users"]),
+        "password": SEED_PASSWORD,
+    })
+    _expect(response, 303)
+
+
+@scenario
+async def users(client, ctx: Dict[str, Any], i: int) -> None:
+    response = await client.get("/users", cookies={"access_token": ctx["token"]})
+    _expect(response, 200)
+
+
+@scenario
+async def api_login(client, ctx: Dict[str, Any], i: int) -> None:
+    response = await client.post("/api/v1/auth/login", data={
+        "username": SEED_EMAIL.format(i % ctx["seed_users"]),
+        "password": SEED_PASSWORD,
+    })
+    _expect(response, 200)
+
+
+@scenario
+async def api_users(client, ctx: Dict[str, Any], i: int) -> None:
+    response = await client.get("/api/v1/users/", headers={"Authorization": f"Bearer {ctx['token']}"})
+    _expect(response, 200)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(ordered), 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+async def run_scenario(make_client, name: str, ctx: Dict[str, Any], requests: int, concurrency: int) -> Dict[str, float]:
+    func = SCENARIOS[name]
+    latencies: List[float] = []
+    errors: List[str] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        async with make_client() as client:
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    await func(client, ctx, i)
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, len(errors), time.perf_counter() - started)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+async def seed(count: int, batch_size: int = 1000) -> int:
+    """Top the users table up to ``count`` seed users sharing one password hash"""
+    from sqlalchemy import func, select
+
+    from app.core.database import AsyncSessionLocal, init_db
+    from app.core.security import get_password_hash
+    from app.crud.user import insert_users
+    from app.models.user import GenderEnum, User
+
+    init_db()
+    genders = list(GenderEnum)
+    hashed_password = get_password_hash(SEED_PASSWORD)
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(
+            select(func.count()).select_from(User).where(User.email.like("seed%@bench.example.com"))
+        )
+        for start in range(existing, count, batch_size):
+            await insert_users(db, [
+                {
+                    "first_name": f"First{n}",
+                    "last_name": f"Last{n}",
+                    "gender": genders[n % len(genders)],
+                    "nationality": f"Country{n % 50}",
+                    "organization": f"Organization{n % 500}",
+                    "position": f"Position{n % 20}",
+                    "birth_date": date(1960 + n % 40, 1 + n % 12, 1 + n % 28),
+                    "email": SEED_EMAIL.format(n),
+                    "hashed_password": hashed_password,
+                }
+                for n in range(start, min(start + batch_size, count))
+            ])
+    return max(count - existing, 0)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    seeded = await seed(args.seed_users)
+    print(f"Seeded {seeded} users ({args.seed_users} total) in {args.db}")
+
+    from app.core.security import create_access_token
+    from app.core.database import dispose_engines
+
+    ctx = {
+        "run_id": datetime.utcnow().strftime("%Y%m%d%H%M%S%f"),
+        "seed_users": args.seed_users,
+        "token": create_access_token(subject=1),
+    }
+    await dispose_engines()
+
+    process = None
+    if args.mode == "uvicorn":
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"],
+            env=os.environ.copy(),
+        )
+
+        def make_client():
+            return httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+
+        def make_client():
+            return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+    results: Dict[str, Any] = {}
+    try:
+        if process is not None:
+            await _wait_until_ready(base_url, process)
+            lifespan = None
+        else:
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+
+        for name in args.scenarios:
+            # Warm-up: first-hit costs (template compilation, pool connections)
+            await run_scenario(make_client, name, {**ctx, "run_id": ctx["run_id"] + "w"}, args.concurrency, args.concurrency)
+            results[name] = await run_scenario(make_client, name, ctx, args.requests, args.concurrency)
+            print(_format_row(name, results[name]))
+
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        # Pooled aiosqlite connections would otherwise keep the process alive
+        await dispose_engines()
+
+    return results
+
+
+def _format_row(name: str, result: Dict[str, float]) -> str:
+    return (
+        f"{name:<10} {result['throughput_per_second']:>9.1f}/s  p50 {result['p50_ms']:>8.1f}ms  "
+        f"p95 {result['p95_ms']:>8.1f}ms  p99 {result['p99_ms']:>8.1f}ms  errors {result['errors']}"
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for name, result in results.items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("throughput_per_second", "p50_ms", "p95_ms", "p99_ms"):
+            if old[key]:
+                changes.append(f"{key} {(result[key] - old[key]) / old[key] * 100:+.1f}%")
+        print(f"  {name:<10} " + "  ".join(changes))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--db", type=Path, default=Path(".cache/bench.db"), help="SQLite database to seed and use")
+    parser.add_argument("--seed-users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="Iterations per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated, from: " + ", ".join(SCENARIOS))
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON results to compare against")
+    parser.add_argument("--app-logging", action="store_true", help="Keep the app's INFO logging on")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    # The app reads its settings at import time, so configure it first
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("LOGIN_RATE_LIMIT", "1000000000")
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_ACCOUNT", "1000000000")
+    if not args.app_logging:
+        os.environ.setdefault("LOG_LEVELS", "app=WARNING,uvicorn.error=WARNING,uvicorn.access=WARNING,httpx=WARNING")
+
+    results = asyncio.run(run(args))
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "config": {
+            "mode": args.mode,
+            "workers": args.workers,
+            "seed_users": args.seed_users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cpu_count": os.cpu_count(),
+            "python": sys.version.split()[0],
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+    return 1 if any(result["errors"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Per-request overhead of the security-header middleware stacks.
+
+Compares the previous ``@app.middleware("http")`` hook with the plain ASGI
+SecurityHeadersMiddleware, with and without GZipMiddleware, by calling the
+ASGI app directly (no network, no HTTP client).
+
+Usage:
+    python -m benchmarks.middleware [--requests 5000] [--rows 200]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+
+from app.core.middleware import GZipMiddleware, SecurityHeadersMiddleware, SECURITY_HEADERS
+
+
+def _users_like_page(rows: int) -> str:
+    row = (
+        "<tr><td>{i}</td><td>First {i}</td><td>Last {i}</td><td>Organization {o}</td>"
+        "<td>Position</td><td>Nationality</td><td><span class=\"badge\">Male</span></td></tr>"
+    )
+    body = "".join(row.format(i=i, o=i % 17) for i in range(rows))
+    return f"<html><body><table class=\"table\"><tbody>{body}</tbody></table></body></html>"
+
+
+def build_app(stack: str, page: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/users")
+    async def users():
+        return HTMLResponse(page)
+
+    if stack == "decorator":
+        @app.middleware("http")
+        async def add_security_headers(request: Request, call_next):
+            response = await call_next(request)
+            for name, value in SECURITY_HEADERS.items():
+                response.headers[name] = value
+            return response
+    else:
+        if stack == "asgi+gzip":
+            app.add_middleware(GZipMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def _request(app, scope) -> int:
+    size = 0
+    received = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    done.set()
+    return size
+
+
+async def run(stack: str, requests: int, page: str):
+    app = build_app(stack, page)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/users", "raw_path": b"/users", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    for _ in range(100):
+        await _request(app, dict(scope))
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        size = await _request(app, dict(scope))
+    elapsed = time.perf_counter() - started
+    return elapsed / requests * 1e6, size
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.middleware")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=200, help="Table rows in the simulated users page")
+    args = parser.parse_args(argv)
+
+    page = _users_like_page(args.rows)
+    print(f"{'stack':<12}{'us/request':>12}{'body bytes':>12}")
+    for stack in ("decorator", "asgi", "asgi+gzip"):
+        per_request, size = asyncio.run(run(stack, args.requests, page))
+        print(f"{stack:<12}{per_request:>12.1f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
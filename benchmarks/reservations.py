@@ -0,0 +1,200 @@
+"""Stress test for seat reservation: many processes race for a few seats.
+
+Every attempt is a distinct participant calling app.crud.agenda.reserve_seat
+on one session, from --concurrency tasks in each of --processes worker
+processes (each with its own connection pool), so the database sees truly
+parallel writers. A fraction of the successful reservations is cancelled
+right away, freeing seats for the attempts still in flight.
+
+Afterwards the run is checked: the session's seat counter must equal its
+reservation rows, never exceed the capacity, and match the reservations
+made minus those cancelled. Any mismatch exits non-zero.
+
+Usage:
+    python -m benchmarks.reservations [--processes 4] [--concurrency 50]
+        [--attempts 5000] [--capacity 100] [--cancel-rate 0.2]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+def _configure(db: Path) -> None:
+    # The app reads its settings at import time; worker processes inherit this
+    os.environ["DATABASE_URL"] = f"sqlite:///{db}"
+    os.environ.setdefault("LOG_LEVELS", "app=WARNING")
+
+
+async def _prepare(attempts: int, capacity: int) -> int:
+    from app.core.database import AsyncSessionLocal, dispose_engines, init_db
+    from app.crud.agenda import create_session
+    from app.crud.user import insert_users
+    from app.models.user import GenderEnum
+    from app.schemas.agenda import AgendaSessionCreate
+
+    init_db()
+    async with AsyncSessionLocal() as db:
+        for start in range(0, attempts, 1000):
+            await insert_users(db, [
+                {
+                    "first_name": f"First{n}",
+                    "last_name": f"Last{n}",
+                    "gender": GenderEnum.OTHER,
+                    "nationality": "Benchland",
+                    "organization": "Load Test",
+                    "position": "Tester",
+                    "birth_date": date(1990, 1, 1),
+                    "email": f"reserve{n}@bench.example.com",
+                    "hashed_password": "x",
+                }
+                for n in range(start, min(start + 1000, attempts))
+            ])
+        starts_at = datetime.utcnow() + timedelta(days=1)
+        session = await create_session(db, AgendaSessionCreate(
+            title="Contested workshop",
+            starts_at=starts_at,
+            ends_at=starts_at + timedelta(hours=1),
+            capacity=capacity,
+        ))
+    await dispose_engines()
+    return session.id
+
+
+async def _hammer(session_id: int, user_ids: List[int], concurrency: int, cancel_rate: float) -> Tuple[Dict[str, int], List[float]]:
+    from fastapi import HTTPException
+
+    from app.core.database import AsyncSessionLocal, dispose_engines
+    from app.crud.agenda import cancel_reservation, reserve_seat
+
+    outcomes: Counter = Counter()
+    latencies: List[float] = []
+    pending = iter(user_ids)
+    rng = random.Random(os.getpid())
+
+    async def worker():
+        for user_id in pending:
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                reserved = False
+                try:
+                    await reserve_seat(db, session_id, user_id)
+                    reserved = True
+                    outcomes["reserved"] += 1
+                except HTTPException as e:
+                    outcomes[{409: "rejected", 503: "busy"}.get(e.status_code, "error")] += 1
+                latencies.append(time.perf_counter() - started)
+
+                if reserved and rng.random() < cancel_rate:
+                    try:
+                        if await cancel_reservation(db, session_id, user_id):
+                            outcomes["cancelled"] += 1
+                    except HTTPException:
+                        outcomes["cancel_busy"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await dispose_engines()
+    return dict(outcomes), latencies
+
+
+def _run_worker(args) -> Tuple[Dict[str, int], List[float]]:
+    db, session_id, user_ids, concurrency, cancel_rate = args
+    _configure(db)
+    return asyncio.run(_hammer(session_id, user_ids, concurrency, cancel_rate))
+
+
+async def _verify(session_id: int) -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.core.database import AsyncSessionLocal, dispose_engines
+    from app.models.agenda import AgendaSession, Reservation
+
+    async with AsyncSessionLocal() as db:
+        session = await db.get(AgendaSession, session_id)
+        rows = await db.scalar(select(func.count()).select_from(Reservation).where(Reservation.session_id == session_id))
+        duplicates = await db.scalar(
+            select(func.count()).select_from(
+                select(Reservation.user_id)
+                .where(Reservation.session_id == session_id)
+                .group_by(Reservation.user_id)
+                .having(func.count() > 1)
+                .subquery()
+            )
+        )
+        result = {"capacity": session.capacity, "seats_taken": session.seats_taken, "rows": rows, "duplicates": duplicates}
+    await dispose_engines()
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.reservations")
+    parser.add_argument("--db", type=Path, default=Path(".cache/reservations.db"), help="SQLite database (recreated)")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=25, help="Concurrent attempts per process (at most DB_POOL_SIZE + DB_MAX_OVERFLOW)")
+    parser.add_argument("--attempts", type=int, default=5000, help="Total attempts, one distinct participant each")
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--cancel-rate", type=float, default=0.2, help="Share of reservations cancelled right away")
+    args = parser.parse_args(argv)
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{args.db}{suffix}").unlink(missing_ok=True)
+    _configure(args.db)
+
+    session_id = asyncio.run(_prepare(args.attempts, args.capacity))
+    user_ids = list(range(1, args.attempts + 1))
+    random.shuffle(user_ids)
+    chunks = [
+        (args.db, session_id, user_ids[i::args.processes], args.concurrency, args.cancel_rate)
+        for i in range(args.processes)
+    ]
+
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        results = pool.map(_run_worker, chunks)
+    elapsed = time.perf_counter() - started
+
+    outcomes: Counter = Counter()
+    latencies: List[float] = []
+    for worker_outcomes, worker_latencies in results:
+        outcomes.update(worker_outcomes)
+        latencies.extend(worker_latencies)
+    latencies.sort()
+    state = asyncio.run(_verify(session_id))
+
+    print(
+        f"{args.attempts} attempts from {args.processes}x{args.concurrency} tasks in {elapsed:.2f}s "
+        f"({args.attempts / elapsed:.0f}/s), p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms"
+    )
+    print("Outcomes: " + ", ".join(f"{key} {value}" for key, value in sorted(outcomes.items())))
+    print(f"Session: {state['seats_taken']}/{state['capacity']} seats taken, {state['rows']} reservation rows")
+
+    failures = []
+    if state["seats_taken"] > state["capacity"]:
+        failures.append("oversold")
+    if state["seats_taken"] != state["rows"]:
+        failures.append("seat counter does not match reservation rows")
+    if state["rows"] != outcomes["reserved"] - outcomes["cancelled"]:
+        failures.append("reservation rows do not match reservations made minus cancelled")
+    if state["duplicates"]:
+        failures.append(f"{state['duplicates']} participants hold more than one seat")
+    if outcomes["error"]:
+        failures.append(f"{outcomes['error']} unexpected errors")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        return 1
+    print("OK: no oversell, counters consistent")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())